@@ -0,0 +1,164 @@
+"""
+Admission control for expensive endpoints.
+
+An AdmissionGate lets `concurrency` requests run and up to `queue_size` more
+wait; anything beyond that is rejected straight away so the caller can answer
+429 with a Retry-After hint instead of piling more work onto a saturated CPU.
+Waiting is bounded by `max_wait` seconds, which bounds tail latency too: a
+request that can't start in time is rejected rather than served late.
+
+With `fair=True` waiters are grouped by client and slots are handed out
+round-robin across clients, so one client uploading a hundred files queues
+behind itself instead of in front of everyone else.
+
+    gate = AdmissionGate('/api/scorecard', concurrency=4, queue_size=16)
+    try:
+        gate.acquire(client=request.remote_addr)
+    except Rejected as e:
+        return busy_response(e.retry_after)
+    try:
+        ...
+    finally:
+        gate.release()
+
+A server that queues work before the app runs (the ASGI adapter's thread
+pools) admits the request itself, before queueing it, and stores the gate in
+the WSGI environ under ENVIRON_KEY so the app doesn't gate it a second time.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+ENVIRON_KEY = 'qias.admission'
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('event', 'granted')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionGate:
+    def __init__(self, name: str, concurrency: int, queue_size: int, max_wait: float = 10.0, fair: bool = False):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.max_wait = max_wait
+        self.fair = fair
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = {'queue_full': 0, 'timeout': 0}
+        self._queues: 'OrderedDict[object, deque]' = OrderedDict()  # client -> waiters
+        self._lock = threading.Lock()
+        self._service_s = 1.0  # moving average of time a slot is held
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new request."""
+        backlog = (self.active + self.waiting) / self.concurrency
+        return max(1, min(60, math.ceil(self._service_s * backlog)))
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without waiting; False (and nothing counted) when none is free."""
+        with self._lock:
+            if self.active < self.concurrency and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return True
+            return False
+
+    def capacity(self) -> int:
+        """Requests the gate can hold at once, running plus waiting."""
+        return self.concurrency + self.queue_size
+
+    def acquire(self, client=None) -> float:
+        """Take a slot, waiting in the queue if needed; returns seconds waited or raises Rejected."""
+        key = client if self.fair else None
+        with self._lock:
+            if self.active < self.concurrency and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return 0.0
+            if self.waiting >= self.queue_size:
+                self.rejected['queue_full'] += 1
+                raise Rejected('queue_full', self.retry_after())
+            waiter = _Waiter()
+            self._queues.setdefault(key, deque()).append(waiter)
+            self.waiting += 1
+        started = time.perf_counter()
+        waiter.event.wait(self.max_wait)
+        with self._lock:
+            if not waiter.granted:
+                queue = self._queues.get(key)
+                if queue is not None:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[key]
+                self.waiting -= 1
+                self.rejected['timeout'] += 1
+                raise Rejected('timeout', self.retry_after())
+            self.admitted += 1
+        return time.perf_counter() - started
+
+    def release(self, held_s: Optional[float] = None):
+        """Free a slot (handing it to the next waiter, if any); `held_s` feeds the Retry-After estimate."""
+        with self._lock:
+            if held_s is not None:
+                self._service_s = 0.8 * self._service_s + 0.2 * held_s
+            if self.waiting:
+                # Oldest waiter of the client at the head; that client then goes to the back
+                key, queue = next(iter(self._queues.items()))
+                waiter = queue.popleft()
+                if queue:
+                    self._queues.move_to_end(key)
+                else:
+                    del self._queues[key]
+                self.waiting -= 1
+                waiter.granted = True
+                waiter.event.set()  # the slot passes straight to the waiter; active is unchanged
+            else:
+                self.active -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "concurrency": self.concurrency,
+                "queue_size": self.queue_size,
+                "active": self.active,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "fair": self.fair,
+                "clients_waiting": len(self._queues) if self.fair else None,
+            }
+
+
+def parse_limits(spec: str, default_concurrency: int, default_queue: int) -> Dict[str, tuple]:
+    """Parse "path=concurrency[:queue],..." (e.g. "/api/scorecard=4:16,/api/report=2") into {path: (c, q)}."""
+    limits = {}
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        path, _, value = part.partition('=')
+        concurrency, _, queue = value.partition(':')
+        try:
+            c = int(concurrency) if concurrency else default_concurrency
+            q = int(queue) if queue else (4 * c if concurrency else default_queue)
+        except ValueError:
+            print(f"WARN: Ignoring malformed admission limit '{part}'.")
+            continue
+        limits[path.strip()] = (c, q)
+    return limits
@@ -1,39 +1,172 @@
+import bisect
+import os
 import re
-import spacy
-from typing import Dict, List, Any
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+import metrics
+import ner_cache
 
 # --- 1. SETUP ---
-# Load the small English model from spaCy. This is fast and reliable for hackathons.
-try:
-    nlp = spacy.load("en_core_web_sm")
-    print("INFO: spaCy model loaded successfully.")
-except:
-    print("ERROR: spaCy model not found. Please run: python -m spacy download en_core_web_sm")
-    # Note: if the model isn't available the rest of the extraction will still run
-    # using simple rule-based fallbacks, but performance may be reduced.
+# The small English spaCy model is loaded on first use (or by warmup()), not at
+# import: importing spaCy and the model takes most of a second, which every
+# worker start, test run and script would otherwise pay up front.
+SPACY_MODEL = "en_core_web_sm"
+_nlp = None
+_nlp_loaded = False
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """Return the spaCy pipeline, loading it once (thread-safe); None if unavailable."""
+    global _nlp, _nlp_loaded
+    if _nlp_loaded:
+        return _nlp
+    with _nlp_lock:
+        if not _nlp_loaded:
+            started = time.perf_counter()
+            try:
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL)
+                print(f"INFO: spaCy model loaded successfully ({time.perf_counter() - started:.2f}s).")
+            except Exception:
+                print("ERROR: spaCy model not found. Please run: python -m spacy download en_core_web_sm")
+                # Note: if the model isn't available the rest of the extraction will still run
+                # using simple rule-based fallbacks, but performance may be reduced.
+            _nlp_loaded = True
+    return _nlp
+
+
+def warmup():
+    """Load the spaCy model now rather than on the first extraction."""
+    return get_nlp() is not None
+
+
+# NER output can be cached across runs (QIAS_NER_CACHE=path/to/ner_cache.db, or
+# set_ner_cache()); see ner_cache.py. Re-extracting a cached text only costs the
+# regex extractors, and the model isn't even loaded until a text misses.
+_ner_cache = None
+_ner_cache_ready = False
+_model_key = None
+
+
+def set_ner_cache(path: Optional[str]):
+    """Use the NER cache at `path` (None disables it)."""
+    global _ner_cache, _ner_cache_ready
+    with _nlp_lock:
+        _ner_cache = ner_cache.NerCache(path) if path else None
+        _ner_cache_ready = True
+
+
+def get_ner_cache() -> Optional[ner_cache.NerCache]:
+    if not _ner_cache_ready:
+        set_ner_cache(os.environ.get('QIAS_NER_CACHE') or None)
+    return _ner_cache
+
+
+def model_key() -> str:
+    """Model name and installed version, read from package metadata without loading the model."""
+    global _model_key
+    if _model_key is None:
+        try:
+            from importlib.metadata import version
+            _model_key = f"{SPACY_MODEL}-{version(SPACY_MODEL)}"
+        except Exception:
+            _model_key = f"{SPACY_MODEL}-unknown"
+    return _model_key
+
+
+# --- 2. LIMITS ---
+# Every lazy gap in the patterns below is capped at MATCH_WINDOW characters. An
+# unbounded `.*?` rescans to the end of the line from each occurrence of its
+# prefix, which is quadratic on long, repetitive text (OCR output, or input
+# built to be slow); with the cap each search stays linear in the text length.
+MATCH_WINDOW = 300
+_GAP = r".{0,%d}?" % MATCH_WINDOW
+# Amounts are captured up to 20 characters (digits and commas), for the same reason
+_AMOUNT = r"([\d,]{1,20})"
+
+# Wall-clock budget per document (QIAS_EXTRACTION_DEADLINE_S, 0 disables). It
+# is checked between fields and between NER chunks: a field that hasn't run
+# when time is up comes back as None and is listed under "undetermined".
+EXTRACTION_DEADLINE_S = float(os.environ.get('QIAS_EXTRACTION_DEADLINE_S', '10'))
+NER_CHUNK_CHARS = 20000
+
+DEADLINE_HITS = metrics.counter('qias_extraction_deadline_total',
+                                'Extraction steps skipped or cut short by the deadline.', ('field',))
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """Time budget for one extraction. Python's re can't be interrupted, so it is checked between steps."""
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self._at = time.monotonic() + seconds if seconds else None
+
+    def check(self):
+        if self._at is not None and time.monotonic() >= self._at:
+            raise DeadlineExceeded(f"deadline of {self.seconds:g}s exceeded")
+
+
+def _check(deadline: Optional[Deadline]):
+    if deadline is not None:
+        deadline.check()
+
+
+def _chain(parts: List[str], text: str, deadline: Deadline = None) -> bool:
+    """Whether `parts` match in order, each within MATCH_WINDOW characters of the last (same line).
+
+    Same result as re.search("p1{_GAP}p2{_GAP}p3", text), without its cost:
+    with two gaps the regex backtracks through window x window steps per
+    occurrence of p1, and no deadline check can interrupt a single search.
+    Here each part is found once with finditer and matched to the nearest
+    preceding end of the part before, so the cost stays linear.
+    """
+    ends = None
+    for part in parts:
+        found = []
+        for m in re.finditer(part, text):
+            _check(deadline)
+            if ends is not None:
+                i = bisect.bisect_right(ends, m.start()) - 1
+                # The nearest end is the only candidate: a farther one has a longer gap
+                # and crosses the same newline, if any
+                if i < 0 or m.start() - ends[i] > MATCH_WINDOW or '\n' in text[ends[i]:m.start()]:
+                    continue
+            found.append(m.end())
+        if not found:
+            return False
+        ends = found
+    return True
 
 
-# --- 2. EXTRACTION HELPER FUNCTIONS ---
+# --- 3. EXTRACTION HELPER FUNCTIONS ---
 
-def extract_financials(text: str) -> int:
+def extract_financials(text: str, deadline: Deadline = None) -> int:
     """
     Extracts the Paid-Up Capital amount from the text using multiple pattern matches.
     Target: QAR 5,000,000 or variations
     """
     # Try multiple patterns for better coverage
     patterns = [
-        r"Paid-Up Capital:.*?was QAR ([\d,]+)",  # Original pattern
-        r"Paid-Up Capital:.*?QAR ([\d,]+)",       # Without "was"
-        r"Paid[- ]?Up Capital.*?QAR ([\d,]+)",    # Flexible spacing
-        r"initial capital.*?QAR ([\d,]+)",        # "initial capital"
-        r"secured QAR ([\d,]+)",                  # "secured QAR"
-        r"started with QAR ([\d,]+)",             # "started with QAR"
-        r"seed funding.*?QAR ([\d,]+)",           # "seed funding"
-        r"capital.*?QAR ([\d,]+)",                # Generic "capital"
-        r"QAR ([\d,]+).*?capital",                # Capital after amount
+        rf"Paid-Up Capital:{_GAP}was QAR {_AMOUNT}",   # Original pattern
+        rf"Paid-Up Capital:{_GAP}QAR {_AMOUNT}",       # Without "was"
+        rf"Paid[- ]?Up Capital{_GAP}QAR {_AMOUNT}",    # Flexible spacing
+        rf"initial capital{_GAP}QAR {_AMOUNT}",        # "initial capital"
+        rf"secured QAR {_AMOUNT}",                     # "secured QAR"
+        rf"started with QAR {_AMOUNT}",                # "started with QAR"
+        rf"seed funding{_GAP}QAR {_AMOUNT}",           # "seed funding"
+        rf"capital{_GAP}QAR {_AMOUNT}",                # Generic "capital"
+        rf"QAR {_AMOUNT}{_GAP}capital",                # Capital after amount
     ]
     
     for pattern in patterns:
+        _check(deadline)
         match = re.search(pattern, text, re.IGNORECASE)
         if match:
             # Remove commas and convert to integer
@@ -49,8 +182,6 @@ def extract_business_categories(text: str) -> List[str]:
     """
     categories = []
     text_lower = text.lower()
-    # Normalize simple markup artifacts for explicit phrase checks (e.g., **[ ... ])
-    norm_text = re.sub(r"[\[\]\*]", "", text_lower)
     
     # Category 2 (Marketplace Lending - P2P/Crowdfunding)
     if "peer-to-peer" in text_lower or "p2p" in text_lower or "facilitation of peer-to-peer financing services" in text_lower:
@@ -63,67 +194,118 @@ def extract_business_categories(text: str) -> List[str]:
     # The system must be assessed against the *highest* capital requirement of all applicable categories.
     return categories
 
-def extract_compliance_status(text: str) -> Dict[str, Any]:
+# Define comprehensive location patterns
+LOCATION_PATTERNS = {
+    "Qatar": [r"\bqatar\b", r"state of qatar", r"within qatar", r"in qatar", r"qatar\s+region"],
+    "Ireland": [r"\bireland\b", r"irish\s+region"],
+    "Singapore": [r"\bsingapore\b"],
+    "Dubai": [r"\bdubai\b", r"in dubai"],
+    "UAE": [r"\buae\b", r"united arab emirates"],
+}
+
+def _ner_chunks(text: str, size: int = NER_CHUNK_CHARS):
+    """Split text into pieces of at most `size` characters, preferring line breaks."""
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text):
+            cut = text.rfind('\n', start, end)
+            if cut > start:
+                end = cut + 1
+        yield text[start:end]
+        start = end
+
+def analyse_text(text: str, deadline: Deadline = None):
     """
-    Extracts critical status flags for Compliance Officer, AML Policy, and Data Location.
-    Uses spaCy for basic NER and rule-based keyword matching.
+    spaCy entities (start, end, label) and sentence spans (start, end) for
+    `text`, as character offsets, from the NER cache when possible. Returns
+    (ents, sents, complete). NER runs chunk by chunk; if the deadline hits
+    part-way, what was found so far is returned with complete=False and not
+    cached. Empty when the model isn't available.
+    """
+    cache = get_ner_cache()
+    key = ner_cache.text_key(text, model_key()) if cache is not None else None
+    if cache is not None:
+        record = cache.get(key)
+        if record is not None:
+            return record[0], record[1], True
+    nlp = get_nlp()
+    if nlp is None:
+        return [], [], False
+    ents, sents = [], []
+    offset = 0
+    try:
+        for chunk in _ner_chunks(text):
+            _check(deadline)
+            started = time.perf_counter()
+            doc = nlp(chunk)
+            metrics.STAGE_SECONDS.observe(time.perf_counter() - started, 'ner')
+            ents.extend((offset + ent.start_char, offset + ent.end_char, ent.label_) for ent in doc.ents)
+            if doc.has_annotation("SENT_START"):
+                sents.extend((offset + sent.start_char, offset + sent.end_char) for sent in doc.sents)
+            offset += len(chunk)
+    except DeadlineExceeded:
+        DEADLINE_HITS.inc('ner')
+        return ents, sents, False
+    except Exception:
+        return ents, sents, False
+    if cache is not None:
+        cache.put(key, ents, sents)
+    return ents, sents, True
+
+def extract_gpe_entities(text: str, deadline: Deadline = None) -> List[str]:
+    """Geo-political entities found by spaCy NER (or the NER cache), in document order.
+
+    Raises DeadlineExceeded when the deadline cut NER short: a partial list
+    would let data_storage_location pass on the places seen so far.
+    """
+    ents, _, complete = analyse_text(text, deadline)
+    if not complete:
+        _check(deadline)  # incomplete for lack of a model is fine; for lack of time it isn't
+    return [text[start:end].strip() for start, end, label in ents if label == "GPE"]  # Geo-Political Entity
+
+def extract_data_locations(text: str, deadline: Deadline = None, gpe_entities: List[str] = None) -> List[str]:
+    """
+    Data Storage Location (Rule: MUST be Qatar).
+    Uses keyword patterns plus spaCy NER for geo-political entities
+    (`gpe_entities`, run here when not given).
     """
-    status = {
-        "data_storage_location": [],
-        "has_compliance_officer": False,
-        "has_board_approved_aml": False,
-        "has_signed_aoa": False,
-        # Additive flag for explicit positive P2P monitoring phrase (for 100% compliant doc)
-        "has_p2p_monitoring_system": False
-    }
-    
-    # 3.1 Data Storage Location (Rule: MUST be Qatar)
-    # Use spaCy NER to find geo-political entities + keyword matching
     text_lower = text.lower()
     # Normalized text for explicit phrase checks (strip simple markup like **[ ... ])
     norm_text = re.sub(r"[\[\]\*]", "", text_lower)
-    
-    # Define comprehensive location patterns
-    location_patterns = {
-        "Qatar": [r"\bqatar\b", r"state of qatar", r"within qatar", r"in qatar", r"qatar\s+region"],
-        "Ireland": [r"\bireland\b", r"irish\s+region"],
-        "Singapore": [r"\bsingapore\b"],
-        "Dubai": [r"\bdubai\b", r"in dubai"],
-        "UAE": [r"\buae\b", r"united arab emirates"],
-    }
-    
+
     detected_locations = []
-    for location, patterns in location_patterns.items():
+    for location, patterns in LOCATION_PATTERNS.items():
         for pattern in patterns:
             if re.search(pattern, text_lower):
                 if location not in detected_locations:
                     detected_locations.append(location)
                 break
-    
+
     # Also use spaCy NER for additional locations
-    try:
-        doc = nlp(text)
-        for ent in doc.ents:
-            if ent.label_ == "GPE":  # Geo-Political Entity
-                location_name = ent.text.strip()
-                # Normalize
-                if "Qatar" in location_name and "Qatar" not in detected_locations:
-                    detected_locations.append("Qatar")
-                elif location_name not in detected_locations:
-                    # Check if it's one of our known locations
-                    for known_loc in location_patterns.keys():
-                        if known_loc.lower() in location_name.lower():
-                            if known_loc not in detected_locations:
-                                detected_locations.append(known_loc)
-                            break
-    except Exception:
-        pass
-    
-    status["data_storage_location"] = detected_locations
-    
-    # 4. Current Compliance and Governance Plan
-    
-    # Compliance Officer Status (Rule: Must be designated & independent)
+    if gpe_entities is None:
+        gpe_entities = extract_gpe_entities(text, deadline)
+    for location_name in gpe_entities:
+        # Normalize
+        if "Qatar" in location_name and "Qatar" not in detected_locations:
+            detected_locations.append("Qatar")
+        elif location_name not in detected_locations:
+            # Check if it's one of our known locations
+            for known_loc in LOCATION_PATTERNS.keys():
+                if known_loc.lower() in location_name.lower():
+                    if known_loc not in detected_locations:
+                        detected_locations.append(known_loc)
+                    break
+
+    # Ensure positive Qatar residency phrase adds 'Qatar' to detected locations
+    residency_positive = 'hosted exclusively on servers physically located within the state of qatar'
+    if residency_positive in norm_text and 'Qatar' not in detected_locations:
+        detected_locations.append('Qatar')
+    return detected_locations
+
+def extract_compliance_officer(text: str, deadline: Deadline = None) -> bool:
+    """Compliance Officer Status (Rule: Must be designated & independent)."""
+    text_lower = text.lower()
     # Check for negative indicators first
     negative_indicators = [
         "plan to assign these duties to the head of finance",
@@ -133,65 +315,82 @@ def extract_compliance_status(text: str) -> Dict[str, Any]:
         "do not currently have a dedicated compliance officer"
     ]
     
-    has_negative = any(phrase in text_lower for phrase in negative_indicators)
-    
-    if has_negative:
-        status["has_compliance_officer"] = False
-    elif "compliance officer" in text_lower:
+    if any(phrase in text_lower for phrase in negative_indicators):
+        return False
+    if "compliance officer" in text_lower:
         # Positive indicators
         positive_patterns = [
-            r"(appointed|have|has|designated)\s+.*?compliance officer",
-            r"compliance officer.*?(appointed|designated|independent)",
-            r"(mr\.|ms\.|dr\.)\s+\w+.*?compliance officer",
-            r"compliance officer.*?(mr\.|ms\.|dr\.)",
+            rf"(appointed|have|has|designated)\s{_GAP}compliance officer",
+            rf"compliance officer{_GAP}(appointed|designated|independent)",
+            rf"(mr\.|ms\.|dr\.)\s+\w+{_GAP}compliance officer",
+            rf"compliance officer{_GAP}(mr\.|ms\.|dr\.)",
         ]
-        if any(re.search(pattern, text_lower) for pattern in positive_patterns):
-            status["has_compliance_officer"] = True
-    
-    # AML Policy Status (Rule: Must be Board-approved)
+        for pattern in positive_patterns:
+            _check(deadline)
+            if re.search(pattern, text_lower):
+                return True
+    return False
+
+def extract_aml_policy(text: str, deadline: Deadline = None) -> bool:
+    """AML Policy Status (Rule: Must be Board-approved)."""
+    text_lower = text.lower()
+    norm_text = re.sub(r"[\[\]\*]", "", text_lower)
+    # Explicit positive AML phrase (overrides negatives for compliant docs)
+    aml_positive_explicit = "policy for reporting suspicious transactions is fully board-approved and submitted to the qcb"
+    if aml_positive_explicit in norm_text:
+        return True
+
     # Check for negative indicators
     aml_negative = [
         "policy for reporting suspicious transactions is currently under review",
         "under development",
         "under review",
         "working on developing an aml policy",
-        "aml policy.*?under review",
-        "aml.*?under development"
+        rf"aml policy{_GAP}under review",
+        rf"aml{_GAP}under development"
     ]
-    
-    has_aml_negative = False
     for pattern in aml_negative:
+        _check(deadline)
         if re.search(pattern, text_lower):
-            has_aml_negative = True
-            break
-    
-    # Explicit positive AML phrase (overrides negatives for compliant docs)
-    aml_positive_explicit = "policy for reporting suspicious transactions is fully board-approved and submitted to the qcb"
-    if aml_positive_explicit in norm_text:
-        status["has_board_approved_aml"] = True
-    else:
-        if has_aml_negative:
-            status["has_board_approved_aml"] = False
-        else:
-            # Look for positive indicators
-            aml_positive = [
-                r"board[- ]?approved.*?aml",
-                r"aml.*?board[- ]?approved",
-                r"aml.*?policy.*?(approved|ratified|implemented)",
-                r"anti[- ]?money laundering.*?policy.*?(approved|ratified)",
-            ]
-            if any(re.search(pattern, text_lower) for pattern in aml_positive):
-                status["has_board_approved_aml"] = True
-
-    # AoA Submission (Rule: The document exists and is referenced)
-    if "articles of association" in text_lower:
-        status["has_signed_aoa"] = True # It exists in the provided excerpts
-
-    # Explicit positive P2P monitoring phrase
-    p2p_positive_explicit = "utilize an automated p2p borrower-lender flow monitoring system"
-    if p2p_positive_explicit in norm_text:
-        status["has_p2p_monitoring_system"] = True
+            return False
+
+    # Look for positive indicators
+    aml_positive = [
+        rf"board[- ]?approved{_GAP}aml",
+        rf"aml{_GAP}board[- ]?approved",
+    ]
+    for pattern in aml_positive:
+        _check(deadline)
+        if re.search(pattern, text_lower):
+            return True
+    # Two gaps in one regex would be quadratic in the window; matched part by part instead
+    aml_positive_chained = [
+        ["aml", "policy", "(approved|ratified|implemented)"],
+        ["anti[- ]?money laundering", "policy", "(approved|ratified)"],
+    ]
+    for parts in aml_positive_chained:
+        _check(deadline)
+        if _chain(parts, text_lower, deadline):
+            return True
+    return False
+
+def extract_signed_aoa(text: str) -> bool:
+    """AoA Submission (Rule: The document exists and is referenced)."""
+    return "articles of association" in text.lower()  # It exists in the provided excerpts
 
+def extract_compliance_status(text: str, deadline: Deadline = None) -> Dict[str, Any]:
+    """
+    Extracts critical status flags for Compliance Officer, AML Policy, and Data Location.
+    Uses spaCy for basic NER and rule-based keyword matching.
+    """
+    status = {"data_storage_location": extract_data_locations(text, deadline)}
+    _check(deadline)
+    status["has_compliance_officer"] = extract_compliance_officer(text, deadline)
+    status["has_board_approved_aml"] = extract_aml_policy(text, deadline)
+    status["has_signed_aoa"] = extract_signed_aoa(text)
+    # Additive flag for explicit positive P2P monitoring phrase (for 100% compliant doc)
+    norm_text = re.sub(r"[\[\]\*]", "", text.lower())
+    status["has_p2p_monitoring_system"] = "utilize an automated p2p borrower-lender flow monitoring system" in norm_text
     return status
 
 
@@ -253,45 +452,107 @@ def extract_p2p_monitoring_system(text: str) -> bool:
     return False
 
 
-# --- 3. MAIN EXPORT FUNCTION ---
+# --- 4. EXTRACTOR REGISTRY ---
+
+class Extractor:
+    """Produces one field. Called as fn(text, deadline, **deps), with deps named by `depends`."""
+
+    __slots__ = ('field', 'fn', 'depends', 'public')
+
+    def __init__(self, field: str, fn, depends=(), public: bool = True):
+        self.field = field
+        self.fn = fn
+        self.depends = tuple(depends)
+        self.public = public  # internal fields feed other extractors but aren't returned
+
+
+# field -> extractor; registration order is the output order
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register(field: str, fn, depends=(), public: bool = True):
+    EXTRACTORS[field] = Extractor(field, fn, depends, public)
+
+
+def extraction_fields() -> List[str]:
+    """The fields run_extraction() can return."""
+    return [name for name, ex in EXTRACTORS.items() if ex.public]
+
 
-def run_extraction(full_startup_text: str) -> Dict[str, Any]:
+def plan_extraction(fields=None) -> List[Extractor]:
+    """Extractors needed for `fields` (default: all), dependencies first. Raises ValueError on unknown fields."""
+    wanted = extraction_fields() if fields is None else list(fields)
+    unknown = [f for f in wanted if not isinstance(f, str) or f not in EXTRACTORS or not EXTRACTORS[f].public]
+    if unknown:
+        raise ValueError(f"Unknown extraction field(s): {', '.join(map(str, unknown))}")
+    order, seen = [], set()
+
+    def visit(name, path):
+        if name in seen:
+            return
+        if name in path:
+            raise ValueError(f"Extractor dependency cycle: {' -> '.join(path + (name,))}")
+        for dep in EXTRACTORS[name].depends:
+            visit(dep, path + (name,))
+        seen.add(name)
+        order.append(EXTRACTORS[name])
+
+    for name in wanted:
+        visit(name, ())
+    return order
+
+
+register("paid_up_capital", lambda text, deadline: extract_financials(text, deadline))
+register("business_categories", lambda text, deadline: extract_business_categories(text))
+register("gpe_entities", extract_gpe_entities, public=False)  # the spaCy NER pass
+register("data_storage_location",
+         lambda text, deadline, gpe_entities: extract_data_locations(text, deadline, gpe_entities),
+         depends=("gpe_entities",))
+register("has_compliance_officer", extract_compliance_officer)
+register("has_board_approved_aml", extract_aml_policy)
+register("has_signed_aoa", lambda text, deadline: extract_signed_aoa(text))
+register("entity_type", lambda text, deadline: "LLC")  # Hardcoded from AoA excerpt title
+# P2 additions: data retention and P2P monitoring
+register("has_10_year_retention", lambda text, deadline: extract_data_retention(text))
+register("has_p2p_monitoring_system", lambda text, deadline: extract_p2p_monitoring_system(text))
+
+
+# --- 5. MAIN EXPORT FUNCTION ---
+
+def run_extraction(full_startup_text: str, deadline_s: Optional[float] = None, fields=None) -> Dict[str, Any]:
     """
     The final function called by the Software Engineer (S).
     It consolidates all extracted data into a single structured dictionary.
-    """
-    financials = extract_financials(full_startup_text)
-    categories = extract_business_categories(full_startup_text)
-    compliance = extract_compliance_status(full_startup_text)
-    
-    # Additional checks required by Product (P2): data retention and P2P monitoring
-    has_10_year_retention = extract_data_retention(full_startup_text)
-    has_p2p_monitoring_system = (
-        compliance.get('has_p2p_monitoring_system', False) or
-        extract_p2p_monitoring_system(full_startup_text)
-    )
 
-    # Ensure positive Qatar residency phrase adds 'Qatar' to detected locations
-    text_lower = full_startup_text.lower()
-    norm_text = re.sub(r"[\[\]\*]", "", text_lower)
-    residency_positive = 'hosted exclusively on servers physically located within the state of qatar'
-    data_locations = list(compliance["data_storage_location"]) if isinstance(compliance.get("data_storage_location"), list) else []
-    if residency_positive in norm_text and 'Qatar' not in data_locations:
-        data_locations.append('Qatar')
+    `fields` limits the output to those fields (see extraction_fields()); only
+    the extractors they need run, so e.g. ["paid_up_capital"] never touches spaCy.
+
+    Runs under a deadline of `deadline_s` seconds (default EXTRACTION_DEADLINE_S).
+    Fields not determined in time are None and listed, with the reason, under
+    "undetermined"; the gap analysis treats them as not satisfied.
+    """
+    deadline = Deadline(EXTRACTION_DEADLINE_S if deadline_s is None else deadline_s)
+    plan = plan_extraction(fields)
+    values, undetermined = {}, {}
+    for ex in plan:
+        missing = [dep for dep in ex.depends if dep in undetermined]
+        try:
+            if missing:
+                raise DeadlineExceeded(f"depends on undetermined {missing[0]}")
+            deadline.check()
+            values[ex.field] = ex.fn(full_startup_text, deadline, **{dep: values[dep] for dep in ex.depends})
+        except DeadlineExceeded as e:
+            DEADLINE_HITS.inc(ex.field)
+            undetermined[ex.field] = str(e)
+            values[ex.field] = None
 
     # This structured dictionary is the output the S needs for the Gap Analysis Engine
-    return {
-        "paid_up_capital": financials,
-        "business_categories": categories,
-        "data_storage_location": data_locations or compliance["data_storage_location"],
-        "has_compliance_officer": compliance["has_compliance_officer"],
-        "has_board_approved_aml": compliance["has_board_approved_aml"],
-        "has_signed_aoa": compliance["has_signed_aoa"],
-        "entity_type": "LLC", # Hardcoded from AoA excerpt title
-        # P2 additions
-        "has_10_year_retention": has_10_year_retention,
-        "has_p2p_monitoring_system": has_p2p_monitoring_system
-    }
+    wanted = set(extraction_fields() if fields is None else fields)
+    extracted = {name: values[name] for name in extraction_fields() if name in wanted}
+    undetermined = {name: reason for name, reason in undetermined.items() if name in wanted}
+    if undetermined:
+        extracted["undetermined"] = undetermined
+    return extracted
 
 # Example to test your script:
 if __name__ == '__main__':
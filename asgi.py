@@ -0,0 +1,393 @@
+"""
+ASGI serving mode.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8000
+
+The Flask views stay synchronous; this adapter runs them on bounded thread
+pools picked per route, so the blocking stages never run on the event loop and
+never compete for the same threads as cheap reads:
+
+    analyse  /api/scorecard, /api/scorecard_upload, /api/map_startup_data
+             (PyPDF2/docx parsing, spaCy extraction, scoring)
+    render   /api/report, /api/report/<id>, /api/reports/batch (PDF rendering)
+    light    everything else (/api/status, /api/regulation_texts, /api/assessments, ...)
+
+A burst of uploads queues up behind the `analyse` threads while status checks
+and listings keep being served from `light`. Pool sizes come from
+QIAS_ASGI_ANALYSE_THREADS, QIAS_ASGI_RENDER_THREADS (both default to the CPU
+count) and QIAS_ASGI_LIGHT_THREADS (default 16). Queue depth and active
+threads per pool are exported on /api/metrics.
+
+Admission control (QIAS_ADMISSION, see app.py) happens here, before a request
+is queued on its pool: a request for a gated endpoint takes a gate slot first,
+waits for one (bounded by the gate's queue and QIAS_ADMISSION_WAIT_S) on a
+separate set of waiter threads, or is answered 429 straight away. Gating
+inside Flask would be too late, since by then the request has already sat in
+the pool's queue for as long as the backlog took. The default gate
+concurrency is the smaller of the analyse and render pool sizes.
+
+Response bodies are streamed back through a small bounded queue, so a slow
+client reading a batch ZIP holds back the rendering thread instead of
+buffering the archive in memory. Request bodies larger than
+QIAS_ASGI_MAX_BODY_MB (default 50) are rejected with 413.
+"""
+
+import asyncio
+import concurrent.futures
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import admission
+import metrics
+
+# (path prefix, pool); first match wins
+ROUTE_POOLS = (
+    ('/api/scorecard', 'analyse'),         # also /api/scorecard_upload
+    ('/api/map_startup_data', 'analyse'),
+    ('/api/report', 'render'),             # also /api/report/<id> and /api/reports/batch
+)
+
+_BODY_QUEUE_CHUNKS = 8
+_PUT_POLL_S = 1.0  # how often a pool thread blocked on a full response queue checks the client is still there
+_DISCONNECTED = object()  # _read_body() result when the client left before sending the whole body
+
+
+class _ClientGone(Exception):
+    """Nobody is reading the response any more (client disconnected, or the ASGI task was cancelled)."""
+
+
+class BoundedPool:
+    """A fixed-size thread pool that counts queued and running calls."""
+
+    def __init__(self, name: str, threads: int):
+        self.name = name
+        self.threads = threads
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix=f'qias-{name}')
+
+    def submit(self, fn: Callable, *args):
+        with self._lock:
+            self.queued += 1
+
+        def run():
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        return self._executor.submit(run)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"threads": self.threads, "queued": self.queued, "active": self.active,
+                    "completed": self.completed}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def classify(path: str, routes: Sequence[Tuple[str, str]] = ROUTE_POOLS, default: str = 'light') -> str:
+    for prefix, pool in routes:
+        if path.startswith(prefix):
+            return pool
+    return default
+
+
+def build_environ(scope: dict, body: bytes) -> dict:
+    """WSGI environ for an ASGI HTTP scope with an already-read body (b'' before it is read)."""
+    root = scope.get('root_path', '')
+    path = scope['path']
+    if root and path.startswith(root):
+        path = path[len(root):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    client = scope.get('client')
+    if client:
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = client[0], str(client[1])
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1').lower(), value.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            continue  # set from the body actually read
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        if key in environ:
+            environ[key] += ('; ' if key == 'HTTP_COOKIE' else ',') + value
+        else:
+            environ[key] = value
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+class ExecutorAdapter:
+    """Serve a WSGI app over ASGI, running each request on the pool its route maps to."""
+
+    def __init__(self, wsgi_app, pools: Dict[str, int], routes: Sequence[Tuple[str, str]] = ROUTE_POOLS,
+                 max_body: int = 50 * 1024 * 1024, on_startup: Optional[Callable] = None,
+                 on_shutdown: Optional[Callable] = None, admit: Optional[Callable] = None,
+                 admission_threads: int = 32):
+        self.wsgi_app = wsgi_app
+        self.pools = {name: BoundedPool(name, threads) for name, threads in pools.items()}
+        self.routes = routes
+        self.max_body = max_body
+        self.on_startup = on_startup
+        self.on_shutdown = on_shutdown
+        # admit(environ) -> (AdmissionGate, client) for gated requests, else None
+        self.admit = admit
+        # Threads that wait for a gate slot; one per queue slot keeps waits bounded by the gate alone
+        self.admission_threads = max(1, admission_threads)
+        self._waiters = None
+        self._waiters_lock = threading.Lock()
+        metrics.callback('qias_executor_queued', 'Requests waiting for a thread, by pool.', 'gauge',
+                         lambda: {(name,): p.queued for name, p in self.pools.items()}, ('pool',))
+        metrics.callback('qias_executor_active', 'Requests running, by pool.', 'gauge',
+                         lambda: {(name,): p.active for name, p in self.pools.items()}, ('pool',))
+
+    def stats(self) -> dict:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.shutdown()
+        if self._waiters is not None:
+            self._waiters.shutdown(wait=True)
+        if self.on_shutdown is not None:
+            self.on_shutdown()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    if self.on_startup is not None:
+                        await loop.run_in_executor(None, self.on_startup)
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await loop.run_in_executor(None, self.close)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        """The full request body, None once it exceeds max_body, or _DISCONNECTED."""
+        parts, size = [], 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return _DISCONNECTED
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body:
+                return None
+            parts.append(chunk)
+            if not message.get('more_body', False):
+                return b''.join(parts)
+
+    async def _http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        # Admission needs only the method, path and headers, so it is decided
+        # before the body is read: a rejected upload is never buffered.
+        environ = build_environ(scope, b'')
+        gated = self.admit(environ) if self.admit is not None else None
+        gate = None
+        if gated is not None:
+            gate, client = gated
+            try:
+                await self._acquire(loop, gate, client)
+            except admission.Rejected as e:
+                await send({'type': 'http.response.start', 'status': 429,
+                            'headers': [(b'content-type', b'application/json'),
+                                        (b'retry-after', str(e.retry_after).encode('latin-1'))]})
+                await send({'type': 'http.response.body',
+                            'body': b'{"error": "Server busy, please retry later.", "retry_after": %d}\n'
+                                    % e.retry_after})
+                return
+            environ[admission.ENVIRON_KEY] = gate
+        try:
+            body = await self._read_body(receive)
+        except BaseException:
+            if gate is not None:
+                gate.release()
+            raise
+        if body is _DISCONNECTED or body is None:
+            if gate is not None:
+                gate.release()  # the slot is given back; nothing reaches the app
+            if body is None:
+                await send({'type': 'http.response.start', 'status': 413,
+                            'headers': [(b'content-type', b'application/json')]})
+                await send({'type': 'http.response.body', 'body': b'{"error": "Request body too large."}\n'})
+            return  # a truncated upload must not be analysed, and there's nobody to answer
+        environ['wsgi.input'], environ['CONTENT_LENGTH'] = io.BytesIO(body), str(len(body))
+        pool = self.pools[classify(scope['path'], self.routes)]
+        queue = asyncio.Queue(maxsize=_BODY_QUEUE_CHUNKS)
+        disconnected = threading.Event()
+        pool.submit(self._run_wsgi, environ, loop, queue, disconnected)
+        try:
+            await self._relay(queue, send, disconnected)
+        except asyncio.CancelledError:
+            disconnected.set()  # lets the pool thread give up instead of waiting on the queue
+            raise
+
+    async def _relay(self, queue, send, disconnected):
+        """Send the response chunks the pool thread puts on `queue` to the client."""
+        while True:
+            kind, payload = await queue.get()
+            if kind == 'error':
+                raise payload
+            if disconnected.is_set():
+                # Keep draining so the worker thread isn't left blocked on a full queue
+                if kind == 'end':
+                    return
+                continue
+            try:
+                if kind == 'start':
+                    status, headers = payload
+                    await send({'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                                'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]})
+                elif kind == 'body':
+                    await send({'type': 'http.response.body', 'body': payload, 'more_body': True})
+                else:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    return
+            except Exception:
+                disconnected.set()
+                if kind == 'end':
+                    return
+
+    async def _acquire(self, loop, gate, client):
+        """Take a slot on `gate`: at once when one is free, else by waiting on a waiter thread."""
+        if gate.try_acquire():
+            return
+        with self._waiters_lock:
+            if self._waiters is None:
+                self._waiters = ThreadPoolExecutor(self.admission_threads, thread_name_prefix='qias-admission')
+        waiting = loop.run_in_executor(self._waiters, gate.acquire, client)
+        try:
+            await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            # The waiter thread may still be handed the slot; give it back when it is
+            waiting.add_done_callback(lambda f: f.cancelled() or f.exception() or gate.release())
+            raise
+
+    def _run_wsgi(self, environ, loop, queue, disconnected):
+        """Run the WSGI app on a pool thread, handing the response to the event loop chunk by chunk."""
+        def put(item):
+            try:
+                pending = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            except RuntimeError:  # event loop closed
+                raise _ClientGone()
+            while True:
+                try:
+                    return pending.result(timeout=_PUT_POLL_S)
+                except concurrent.futures.TimeoutError:
+                    # Queue still full: give up if the reader is gone rather than block forever
+                    if disconnected.is_set() or loop.is_closed() or not loop.is_running():
+                        pending.cancel()
+                        raise _ClientGone()
+
+        response = {}
+
+        def flush_headers():
+            if 'sent' not in response:
+                response['sent'] = True
+                put(('start', response['start']))
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and 'sent' in response:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['start'] = (status, headers)
+            return write
+
+        def write(data):
+            flush_headers()
+            if data:
+                put(('body', bytes(data)))
+
+        gate = environ.get(admission.ENVIRON_KEY)
+        started = time.perf_counter()
+        try:
+            try:
+                result = self.wsgi_app(environ, start_response)
+                try:
+                    for chunk in result:
+                        if disconnected.is_set():
+                            break
+                        write(chunk)
+                    flush_headers()
+                finally:
+                    if hasattr(result, 'close'):
+                        result.close()
+            finally:
+                # Free the slot before the response completes, so the next request can take it
+                if gate is not None:
+                    gate.release(time.perf_counter() - started)
+            put(('end', None))
+        except _ClientGone:
+            pass
+        except BaseException as e:
+            try:
+                put(('error', e))
+            except _ClientGone:
+                pass
+
+
+def _threads(name: str, default: int) -> int:
+    return int(os.environ.get(name, '0')) or default
+
+
+def create_application() -> ExecutorAdapter:
+    import app as app_module
+    cpus = os.cpu_count() or 2
+    pools = {
+        'analyse': _threads('QIAS_ASGI_ANALYSE_THREADS', cpus),
+        'render': _threads('QIAS_ASGI_RENDER_THREADS', cpus),
+        'light': _threads('QIAS_ASGI_LIGHT_THREADS', 16),
+    }
+    max_body = int(os.environ.get('QIAS_ASGI_MAX_BODY_MB', '50')) * 1024 * 1024
+    app_module.limit_admission(min(pools['analyse'], pools['render']))
+    return ExecutorAdapter(app_module.app, pools, max_body=max_body,
+                           on_startup=app_module.warmup, on_shutdown=app_module.shutdown_writer,
+                           admit=app_module.admission_for, admission_threads=app_module.admission_capacity())
+
+
+application = create_application()
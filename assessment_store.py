@@ -0,0 +1,918 @@
+import base64
+import csv
+import gzip
+import hashlib
+import io
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import metrics
+
+# SQLite helpers for the assessments table. app.py owns DB_PATH and the
+# public save/list/get functions; the row encoding and the optional
+# write-behind writer live here so scripts can reuse them without Flask.
+
+# Bump when adding a _migrate_vN step below; stored in PRAGMA user_version.
+SCHEMA_VERSION = 1
+
+# Scalar extracted fields promoted to typed columns (list fields go to child tables).
+EXTRACTED_COLUMNS = [
+    ('paid_up_capital', 'INTEGER'),
+    ('entity_type', 'TEXT'),
+    ('has_compliance_officer', 'INTEGER'),
+    ('has_board_approved_aml', 'INTEGER'),
+    ('has_signed_aoa', 'INTEGER'),
+    ('has_10_year_retention', 'INTEGER'),
+    ('has_p2p_monitoring_system', 'INTEGER'),
+]
+
+STORED_COLUMNS = (['id', 'created_at', 'input_len', 'doc_hash', 'rule_version', 'readiness_score',
+                   'failed_mask', 'extra_gaps', 'response'] + [name for name, _ in EXTRACTED_COLUMNS])
+
+INSERT_SQL = (
+    "INSERT INTO assessments (" + ", ".join(STORED_COLUMNS) + ") VALUES ("
+    + ",".join("?" * len(STORED_COLUMNS)) + ")"
+)
+
+# Fields of the canonical GET /api/assessments/<id> body stored in `response`.
+RESPONSE_FIELDS = ['id', 'created_at', 'readiness_score', 'failed_gaps', 'extracted_data', 'score_breakdown']
+
+def init_schema(conn: sqlite3.Connection):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS assessments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            input_len INTEGER,
+            readiness_score INTEGER,
+            failed_gaps TEXT,
+            extracted_data TEXT,
+            score_breakdown TEXT
+        )
+        """
+    )
+    conn.commit()
+    migrate(conn)
+
+
+def migrate(conn: sqlite3.Connection):
+    """Bring an existing assessments DB up to SCHEMA_VERSION (idempotent)."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        _migrate_v1(conn)
+
+
+def _migrate_v1(conn: sqlite3.Connection):
+    """Rebuild the JSON-column table in the compact row format, with its child and rollup tables.
+
+    Rows keep their ids. Each gets its canonical response body, gzip-compressed
+    in `response` (sent as the GET /api/assessments/<id> body as-is); failed
+    checks become bits over the ordered check list of the row's rule version
+    (rule_versions), so gap filters are bitwise predicates. Scalar extracted
+    fields go to typed columns and list fields to the location/category child
+    tables. Legacy input_len (a JSON length, not the input length) and the
+    unknown document hash are cleared. The analytics rollups are backfilled
+    here; from then on insert_rows() keeps them current.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN")
+        for stmt in (
+            """CREATE TABLE rule_versions (
+                id INTEGER PRIMARY KEY,
+                fingerprint TEXT NOT NULL UNIQUE,
+                checks TEXT NOT NULL,
+                weights TEXT NOT NULL
+            )""",
+            """CREATE TABLE assessments_v1 (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at TEXT NOT NULL,
+                input_len INTEGER,
+                doc_hash BLOB,
+                rule_version INTEGER REFERENCES rule_versions(id),
+                readiness_score INTEGER,
+                failed_mask INTEGER NOT NULL DEFAULT 0,
+                extra_gaps TEXT,
+                response BLOB,
+                """ + ",\n                ".join(f"{name} {typ}" for name, typ in EXTRACTED_COLUMNS) + """
+            )""",
+            """CREATE TABLE assessment_locations (
+                assessment_id INTEGER NOT NULL REFERENCES assessments(id),
+                location TEXT NOT NULL,
+                PRIMARY KEY (assessment_id, location)
+            ) WITHOUT ROWID""",
+            """CREATE TABLE assessment_categories (
+                assessment_id INTEGER NOT NULL REFERENCES assessments(id),
+                category TEXT NOT NULL,
+                PRIMARY KEY (assessment_id, category)
+            ) WITHOUT ROWID""",
+            """CREATE TABLE rollup_buckets (
+                period TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                assessments INTEGER NOT NULL,
+                score_sum INTEGER NOT NULL,
+                PRIMARY KEY (period, bucket)
+            ) WITHOUT ROWID""",
+            """CREATE TABLE rollup_checks (
+                period TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                check_name TEXT NOT NULL,
+                failures INTEGER NOT NULL,
+                PRIMARY KEY (period, bucket, check_name)
+            ) WITHOUT ROWID""",
+            """CREATE TABLE rollup_scores (
+                period TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                band INTEGER NOT NULL,
+                assessments INTEGER NOT NULL,
+                PRIMARY KEY (period, bucket, band)
+            ) WITHOUT ROWID""",
+        ):
+            cur.execute(stmt)
+        seq = cur.execute("SELECT seq FROM sqlite_sequence WHERE name='assessments'").fetchone()
+        legacy = cur.execute(
+            "SELECT id, created_at, readiness_score, failed_gaps, extracted_data, score_breakdown FROM assessments"
+        ).fetchall()
+        versions: Dict[str, int] = {}
+        rows, params, children = [], [], ([], [])
+        for aid, created_at, score, failed_json, extracted_json, breakdown_json in legacy:
+            try:
+                result = {
+                    "readiness_score": score or 0,
+                    "failed_gaps": json.loads(failed_json or '[]'),
+                    "extracted_data": json.loads(extracted_json or '{}'),
+                    "score_breakdown": json.loads(breakdown_json or '[]'),
+                }
+            except Exception:
+                result = {"readiness_score": score or 0}
+            row = build_row(result, aid=aid, created_at=created_at)
+            rows.append(row)
+            params.append(_row_params(cur, row, versions))
+            for target, values in zip(children, _child_values(aid, row["extracted"])):
+                target.extend(values)
+        cur.executemany(INSERT_SQL.replace("INTO assessments ", "INTO assessments_v1 ", 1), params)
+        cur.execute("DROP TABLE assessments")
+        cur.execute("ALTER TABLE assessments_v1 RENAME TO assessments")
+        cur.execute("DELETE FROM sqlite_sequence WHERE name IN ('assessments', 'assessments_v1')")
+        top = max([seq[0] if seq else 0] + [r["id"] for r in rows])
+        if top:
+            cur.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('assessments', ?)", (top,))
+        _insert_children(cur, children)
+        _apply_rollups(cur, [(r["created_at"], r["score"], r["failed"]) for r in rows])
+        for stmt in (
+            # Covering index: gap counts over a date range never touch the table
+            "CREATE INDEX ix_assessments_created_mask ON assessments (created_at, rule_version, failed_mask)",
+            "CREATE INDEX ix_assessments_score ON assessments (readiness_score)",
+            "CREATE INDEX ix_locations_location ON assessment_locations (location, assessment_id)",
+            "CREATE INDEX ix_categories_category ON assessment_categories (category, assessment_id)",
+        ):
+            cur.execute(stmt)
+        cur.execute("PRAGMA user_version = 1")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if rows:
+        # Reclaim the pages of the dropped JSON-column table
+        conn.execute("VACUUM")
+
+
+# --- Row codec ---
+def encode_response(body: dict) -> bytes:
+    """Canonical JSON for a stored assessment, gzip-compressed so it can be sent as-is."""
+    raw = json.dumps(body, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(raw, compresslevel=9, mtime=0)
+
+
+def decode_response(blob: Optional[bytes]) -> Dict[str, Any]:
+    return json.loads(gzip.decompress(blob)) if blob else {}
+
+
+def _rules_of(breakdown: list) -> Tuple[List[str], List[Any]]:
+    """Ordered check names and per-check weights that a score breakdown was built from."""
+    checks, weights = [], []
+    for row in breakdown or []:
+        if isinstance(row, dict) and row.get('check') is not None:
+            checks.append(str(row['check']))
+            weights.append(row.get('weight', 0))
+    return checks, weights
+
+
+def _rule_version_id(cur: sqlite3.Cursor, checks: List[str], weights: List[Any], cache: Dict[str, int]) -> int:
+    fingerprint = hashlib.sha1(json.dumps([checks, weights]).encode('utf-8')).hexdigest()
+    vid = cache.get(fingerprint)
+    if vid is None:
+        row = cur.execute("SELECT id FROM rule_versions WHERE fingerprint=?", (fingerprint,)).fetchone()
+        if row:
+            vid = row[0]
+        else:
+            cur.execute("INSERT INTO rule_versions (fingerprint, checks, weights) VALUES (?,?,?)",
+                        (fingerprint, json.dumps(checks), json.dumps(weights)))
+            vid = cur.lastrowid
+        cache[fingerprint] = vid
+    return vid
+
+
+def load_rule_versions(conn: sqlite3.Connection) -> Dict[int, Tuple[List[str], List[Any]]]:
+    return {vid: (json.loads(checks), json.loads(weights))
+            for vid, checks, weights in conn.execute("SELECT id, checks, weights FROM rule_versions")}
+
+
+def failed_mask(failed: List[str], checks: List[str]) -> Tuple[int, List[str]]:
+    """Encode failed gaps as a bitmask over `checks`; gaps outside the list are returned separately.
+
+    The mask is the filter key (bitwise gap predicates, rollups), not a way to
+    rebuild the breakdown: that is read from the stored response body.
+    """
+    mask, extras = 0, []
+    index = {c: i for i, c in enumerate(checks)}
+    for gap in failed or []:
+        if gap in index:
+            mask |= 1 << index[gap]
+        elif gap not in extras:
+            extras.append(gap)
+    return mask, extras
+
+
+def decode_stored(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Return failed_gaps, extracted_data and score_breakdown from a stored row dict.
+
+    All three come from the stored response body, the only copy of the breakdown.
+    """
+    body = decode_response(item.get('response'))
+    return {
+        "failed_gaps": body.get('failed_gaps', []),
+        "extracted_data": body.get('extracted_data', {}),
+        "score_breakdown": body.get('score_breakdown', []),
+    }
+
+
+def load_assessment_blob(conn: sqlite3.Connection, aid: int) -> Optional[bytes]:
+    """Return the stored gzip'd response body for `aid` (one primary-key read), or None."""
+    row = conn.execute("SELECT response FROM assessments WHERE id=?", (aid,)).fetchone()
+    return row[0] if row and row[0] else None
+
+
+def load_assessment(conn: sqlite3.Connection, aid: int) -> Optional[Dict[str, Any]]:
+    """Return a stored assessment as {id, created_at, readiness_score, failed_gaps, extracted_data, score_breakdown}."""
+    blob = load_assessment_blob(conn, aid)
+    return decode_response(blob) if blob else None
+
+
+class BlobLRU:
+    """Thread-safe LRU of assessment id -> stored response blob.
+
+    Stored assessments never change, so entries need no invalidation.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max(0, int(max_entries))
+        self._data: "OrderedDict[int, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, aid: int) -> Optional[bytes]:
+        with self._lock:
+            blob = self._data.get(aid)
+            if blob is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(aid)
+            self.hits += 1
+            return blob
+
+    def put(self, aid: int, blob: bytes):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._data[aid] = blob
+            self._data.move_to_end(aid)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _typed_values(extracted: dict) -> Tuple:
+    values = []
+    for name, typ in EXTRACTED_COLUMNS:
+        v = extracted.get(name)
+        if v is None:
+            values.append(None)
+        elif typ == 'INTEGER':
+            try:
+                values.append(int(v))
+            except Exception:
+                values.append(None)
+        else:
+            values.append(str(v))
+    return tuple(values)
+
+
+def _child_values(aid: int, extracted: dict):
+    locs = [(aid, str(l)) for l in dict.fromkeys(extracted.get('data_storage_location') or [])]
+    cats = [(aid, str(c)) for c in dict.fromkeys(extracted.get('business_categories') or [])]
+    return locs, cats
+
+
+def _insert_children(cur: sqlite3.Cursor, children):
+    locs, cats = children
+    if locs:
+        cur.executemany("INSERT OR IGNORE INTO assessment_locations (assessment_id, location) VALUES (?,?)", locs)
+    if cats:
+        cur.executemany("INSERT OR IGNORE INTO assessment_categories (assessment_id, category) VALUES (?,?)", cats)
+
+
+def build_row(result: dict, aid: Optional[int] = None, created_at: Optional[str] = None,
+              text: Optional[str] = None) -> Dict[str, Any]:
+    """Encode a scorecard result as a row record for insert_rows().
+
+    `aid` may be None, in which case insert_rows() assigns the next id.
+    `text` is the analysed input; its length and SHA-256 are stored with the row.
+    """
+    extracted = result.get('extracted_data', {}) or {}
+    failed = list(result.get('failed_gaps', []) or [])
+    breakdown = list(result.get('score_breakdown', []) or [])
+    checks, weights = _rules_of(breakdown)
+    mask, extras = failed_mask(failed, checks)
+    return {
+        "id": aid,
+        "created_at": created_at or datetime.utcnow().isoformat(),
+        "input_len": len(text) if text is not None else None,
+        "doc_hash": hashlib.sha256(text.encode('utf-8')).digest() if text is not None else None,
+        "score": int(result.get('readiness_score', 0)),
+        "failed": failed,
+        "mask": mask,
+        "extras": extras,
+        "checks": checks,
+        "weights": weights,
+        "extracted": extracted,
+        "breakdown": breakdown,
+    }
+
+
+def _row_params(cur: sqlite3.Cursor, row: Dict[str, Any], versions: Dict[str, int]) -> Tuple:
+    body = {
+        "id": row["id"],
+        "created_at": row["created_at"],
+        "readiness_score": row["score"],
+        "failed_gaps": row["failed"],
+        "extracted_data": row["extracted"],
+        "score_breakdown": row["breakdown"],
+    }
+    return (
+        row["id"],
+        row["created_at"],
+        row["input_len"],
+        row["doc_hash"],
+        _rule_version_id(cur, row["checks"], row["weights"], versions),
+        row["score"],
+        row["mask"],
+        json.dumps(row["extras"]) if row["extras"] else None,
+        encode_response(body),
+    ) + _typed_values(row["extracted"])
+
+
+def _next_row_id(cur: sqlite3.Cursor) -> int:
+    seq = cur.execute("SELECT seq FROM sqlite_sequence WHERE name='assessments'").fetchone()
+    top = cur.execute("SELECT MAX(id) FROM assessments").fetchone()[0]
+    return max(seq[0] if seq else 0, top or 0) + 1
+
+
+def insert_rows(conn: sqlite3.Connection, rows: List[Dict[str, Any]], commit: bool = True) -> Optional[int]:
+    """Insert rows (and their child rows) in a single transaction; return the last id.
+
+    Rows without an id are numbered inside the (IMMEDIATE) transaction, since
+    the id is part of the stored response body. Pass commit=False to add more
+    statements to the same transaction before committing yourself.
+    """
+    started = time.perf_counter()
+    cur = conn.cursor()
+    aid = None
+    children = ([], [])
+    versions: Dict[str, int] = {}
+    try:
+        if not conn.in_transaction:
+            cur.execute("BEGIN IMMEDIATE")
+        next_id = None
+        for row in rows:
+            if row["id"] is None:
+                if next_id is None:
+                    next_id = _next_row_id(cur)
+                row = dict(row, id=next_id)
+                next_id += 1
+            cur.execute(INSERT_SQL, _row_params(cur, row, versions))
+            aid = row["id"]
+            for target, values in zip(children, _child_values(aid, row["extracted"])):
+                target.extend(values)
+        # Failed gaps live in failed_mask/extra_gaps; only list fields need child rows
+        _insert_children(cur, children)
+        _apply_rollups(cur, [(r["created_at"], r["score"], r["failed"]) for r in rows])
+        if commit:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - started, 'db_write')
+    return aid
+
+
+# --- Analytics rollups ---
+ROLLUP_PERIODS = ('day', 'week')
+
+
+def rollup_bucket(created_at: str, period: str) -> str:
+    """Bucket key for an ISO timestamp: the date for 'day', that week's Monday for 'week'."""
+    day = datetime.fromisoformat(created_at[:10]).date()
+    if period == 'week':
+        day -= timedelta(days=day.weekday())
+    return day.isoformat()
+
+
+def score_band(score: int) -> int:
+    """Distribution band index: 0 for 0-9, ... 9 for 90-99, 10 for 100."""
+    return min(max(int(score or 0), 0), 100) // 10
+
+
+def _apply_rollups(cur: sqlite3.Cursor, rows: List[Tuple]):
+    """Fold (created_at, score, failed_gaps) rows into the rollup tables.
+
+    Deltas are aggregated in memory first, so a batch costs one upsert per
+    touched bucket rather than one per row.
+    """
+    buckets: Dict[Tuple, List[int]] = {}
+    checks: Dict[Tuple, int] = {}
+    bands: Dict[Tuple, int] = {}
+    for created_at, score, failed in rows:
+        score = int(score or 0)
+        for period in ROLLUP_PERIODS:
+            b = (period, rollup_bucket(created_at, period))
+            agg = buckets.setdefault(b, [0, 0])
+            agg[0] += 1
+            agg[1] += score
+            bands[b + (score_band(score),)] = bands.get(b + (score_band(score),), 0) + 1
+            for gap in dict.fromkeys(failed or []):
+                checks[b + (gap,)] = checks.get(b + (gap,), 0) + 1
+    if buckets:
+        cur.executemany(
+            "INSERT INTO rollup_buckets (period, bucket, assessments, score_sum) VALUES (?,?,?,?) "
+            "ON CONFLICT(period, bucket) DO UPDATE SET assessments = assessments + excluded.assessments, "
+            "score_sum = score_sum + excluded.score_sum",
+            [k + tuple(v) for k, v in buckets.items()],
+        )
+    if checks:
+        cur.executemany(
+            "INSERT INTO rollup_checks (period, bucket, check_name, failures) VALUES (?,?,?,?) "
+            "ON CONFLICT(period, bucket, check_name) DO UPDATE SET failures = failures + excluded.failures",
+            [k + (v,) for k, v in checks.items()],
+        )
+    if bands:
+        cur.executemany(
+            "INSERT INTO rollup_scores (period, bucket, band, assessments) VALUES (?,?,?,?) "
+            "ON CONFLICT(period, bucket, band) DO UPDATE SET assessments = assessments + excluded.assessments",
+            [k + (v,) for k, v in bands.items()],
+        )
+
+
+def read_rollups(conn: sqlite3.Connection, period: str = 'day', since: Optional[str] = None,
+                 until: Optional[str] = None, checks: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Return per-bucket analytics for `period`, oldest first, reading only rollup tables.
+
+    `since`/`until` are ISO dates compared against bucket keys (until is
+    exclusive). Checks listed in `checks` that never failed in a bucket are
+    reported with a pass rate of 1.0.
+    """
+    where = "period = ?"
+    params: List[Any] = [period]
+    if since:
+        where += " AND bucket >= ?"
+        params.append(rollup_bucket(since, period))
+    if until:
+        where += " AND bucket < ?"
+        params.append(until[:10])
+    out: Dict[str, Dict[str, Any]] = {}
+    for bucket, n, score_sum in conn.execute(
+        f"SELECT bucket, assessments, score_sum FROM rollup_buckets WHERE {where} ORDER BY bucket", params
+    ):
+        out[bucket] = {
+            "bucket": bucket,
+            "assessments": n,
+            "average_score": round(score_sum / n, 2) if n else None,
+            "pass_rate": {c: 1.0 for c in (checks or [])},
+            "score_distribution": {_band_label(b): 0 for b in range(11)},
+        }
+    for bucket, check, failures in conn.execute(
+        f"SELECT bucket, check_name, failures FROM rollup_checks WHERE {where}", params
+    ):
+        if bucket in out and out[bucket]["assessments"]:
+            out[bucket]["pass_rate"][check] = round(1 - failures / out[bucket]["assessments"], 4)
+    for bucket, band, n in conn.execute(
+        f"SELECT bucket, band, assessments FROM rollup_scores WHERE {where}", params
+    ):
+        if bucket in out:
+            out[bucket]["score_distribution"][_band_label(band)] = n
+    return list(out.values())
+
+
+def _band_label(band: int) -> str:
+    return "100" if band >= 10 else f"{band * 10}-{band * 10 + 9}"
+
+
+# --- Keyset-paginated listing ---
+# Fields a caller may project. failed_gaps/extracted_data/score_breakdown are
+# decoded from the compact columns; doc_hash is returned as hex.
+LISTABLE_FIELDS = ['id', 'created_at', 'readiness_score', 'input_len', 'doc_hash', 'failed_gaps', 'extracted_data',
+                   'score_breakdown'] + [name for name, _ in EXTRACTED_COLUMNS]
+DEFAULT_LIST_FIELDS = ['id', 'created_at', 'readiness_score']
+_DECODED_FIELDS = ('failed_gaps', 'extracted_data', 'score_breakdown')
+_CODEC_COLUMNS = ['response']
+
+
+def _stored_columns_for(fields: List[str]) -> List[str]:
+    cols = [f for f in fields if f not in _DECODED_FIELDS]
+    if any(f in _DECODED_FIELDS for f in fields):
+        cols += [c for c in _CODEC_COLUMNS if c not in cols]
+    return cols
+
+
+def _project(stored: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    decoded = decode_stored(stored) if any(f in _DECODED_FIELDS for f in fields) else {}
+    item = {}
+    for f in fields:
+        if f in decoded:
+            item[f] = decoded[f]
+        elif f == 'doc_hash':
+            item[f] = stored[f].hex() if stored[f] else None
+        else:
+            item[f] = stored[f]
+    return item
+
+
+def gap_predicate(versions: Dict[int, Tuple[List[str], List[Any]]], gap: str,
+                  alias: str = 'a') -> Tuple[str, List[Any]]:
+    """SQL predicate for rows that failed `gap`.
+
+    Known checks test the gap's bit in failed_mask for each rule version that
+    has it; only when some version lacks the check is extra_gaps consulted.
+    """
+    terms, params = [], []
+    for vid, (checks, _) in versions.items():
+        if gap in checks:
+            terms.append(f"({alias}.rule_version = ? AND ({alias}.failed_mask & ?) != 0)")
+            params.extend([vid, 1 << checks.index(gap)])
+    if len(terms) < len(versions) or not versions:
+        # Some rule version lacks this check, so it may have been stored as an extra
+        terms.append(f"({alias}.extra_gaps IS NOT NULL AND "
+                     f"EXISTS (SELECT 1 FROM json_each({alias}.extra_gaps) WHERE value = ?))")
+        params.append(gap)
+    return "(" + " OR ".join(terms) + ")", params
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{int(last_id)}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Optional[int]:
+    """Return the exclusive upper id bound encoded in `cursor` (None if malformed)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        if raw.startswith('id:'):
+            return int(raw[3:])
+    except Exception:
+        pass
+    return None
+
+
+def list_assessments(conn: sqlite3.Connection, limit: int = 20, before_id: Optional[int] = None,
+                     min_score: Optional[int] = None, max_score: Optional[int] = None,
+                     since: Optional[str] = None, until: Optional[str] = None,
+                     gap: Optional[str] = None, jurisdiction: Optional[str] = None,
+                     fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Return (items, next_before_id) newest first, using keyset pagination on id.
+
+    Every page is a bounded index walk: date bounds are compared on
+    created_at itself (ids don't follow creation time once ids are reserved
+    in blocks or several processes write, so an id range would drop rows),
+    gap filters are bitwise predicates on failed_mask, and jurisdiction
+    filters drive the walk from the (location, assessment_id) index, so cost
+    does not grow with how far back the cursor is.
+    """
+    fields = [f for f in (fields or DEFAULT_LIST_FIELDS) if f in LISTABLE_FIELDS] or DEFAULT_LIST_FIELDS
+    columns = _stored_columns_for(fields)
+    versions = load_rule_versions(conn)
+    select = ", ".join(f"a.{c}" for c in columns)
+    where: List[str] = []
+    params: List[Any] = []
+    if jurisdiction:
+        source = "assessment_locations k JOIN assessments a ON a.id = k.assessment_id"
+        key = "k.assessment_id"
+        where.append("k.location = ?")
+        params.append(jurisdiction)
+    else:
+        source = "assessments a"
+        key = "a.id"
+    if gap:
+        gap_sql, gap_params = gap_predicate(versions, gap)
+        where.append(gap_sql)
+        params.extend(gap_params)
+    if before_id is not None:
+        where.append(f"{key} < ?")
+        params.append(int(before_id))
+    if since:
+        where.append("a.created_at >= ?")
+        params.append(since)
+    if until:
+        where.append("a.created_at < ?")
+        params.append(until)
+    if min_score is not None:
+        where.append("a.readiness_score >= ?")
+        params.append(int(min_score))
+    if max_score is not None:
+        where.append("a.readiness_score <= ?")
+        params.append(int(max_score))
+    sql = f"SELECT {key}, {select} FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {key} DESC LIMIT ?"
+    params.append(int(limit) + 1)
+
+    rows = conn.execute(sql, params).fetchall()
+    items = [_project(dict(zip(columns, row[1:])), fields) for row in rows[:limit]]
+    next_id = rows[limit - 1][0] if len(rows) > limit and limit > 0 else None
+    return items, next_id
+
+
+# --- Streaming export ---
+EXPORT_FIELDS = ['id', 'created_at', 'input_len', 'doc_hash', 'readiness_score', 'failed_gaps', 'extracted_data',
+                 'score_breakdown']
+CSV_COLUMNS = (['id', 'created_at', 'input_len', 'doc_hash', 'readiness_score', 'failed_gaps']
+               + [name for name, _ in EXTRACTED_COLUMNS] + ['data_storage_location', 'business_categories'])
+
+
+def iter_export_rows(conn: sqlite3.Connection, since: Optional[str] = None, until: Optional[str] = None,
+                     batch_size: int = 500):
+    """Yield stored assessments oldest first as dicts, `batch_size` rows at a time.
+
+    Each batch is its own short keyset query (id > last id seen), read in
+    full before any row is yielded. No statement stays open while the caller
+    streams rows to a slow client, so the export never holds the read lock
+    that would block writers (save_assessment) for the whole download.
+    Memory stays at one batch however large the table is.
+    """
+    columns = _stored_columns_for(EXPORT_FIELDS)
+    where, params = ["id > ?"], []
+    if since:
+        where.append("created_at >= ?")
+        params.append(since)
+    if until:
+        where.append("created_at < ?")
+        params.append(until)
+    sql = f"SELECT {', '.join(columns)} FROM assessments WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+    id_index = columns.index('id')
+    last_id = 0
+    while True:
+        rows = conn.execute(sql, [last_id] + params + [batch_size]).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][id_index]
+        for row in rows:
+            yield _project(dict(zip(columns, row)), EXPORT_FIELDS)
+        if len(rows) < batch_size:
+            break
+
+
+def export_ndjson(items):
+    """Serialize export rows as newline-delimited JSON, one chunk per row."""
+    for item in items:
+        yield json.dumps(item, separators=(',', ':')) + "\n"
+
+
+def export_csv(items):
+    """Serialize export rows as CSV (header first), one chunk per row.
+
+    List values are joined with '; '; the full breakdown is NDJSON-only.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def _take():
+        out = buf.getvalue()
+        buf.seek(0)
+        buf.truncate(0)
+        return out
+
+    writer.writerow(CSV_COLUMNS)
+    yield _take()
+    for item in items:
+        extracted = item.get('extracted_data') or {}
+        row = []
+        for name in CSV_COLUMNS:
+            if name in item and name != 'extracted_data':
+                value = item[name]
+            else:
+                value = extracted.get(name)
+            if isinstance(value, list):
+                value = "; ".join(str(v) for v in value)
+            row.append('' if value is None else value)
+        writer.writerow(row)
+        yield _take()
+
+
+def data_version(conn: sqlite3.Connection) -> int:
+    """Number of assessments folded into the rollups; grows with every committed insert.
+
+    Read from the (small) day rollup table, which insert_rows() updates in the
+    same transaction as the rows. Unlike MAX(id) it also changes when a row
+    commits with a lower id than one already there, which write-behind id
+    blocks, several serve.py workers and bulk_score all produce.
+    """
+    return conn.execute("SELECT COALESCE(SUM(assessments), 0) FROM rollup_buckets WHERE period = 'day'").fetchone()[0]
+
+
+def count_gap_failures(conn: sqlite3.Connection, gap: str, since: Optional[str] = None,
+                       until: Optional[str] = None) -> int:
+    """Count assessments that failed `gap` with since <= created_at < until (ISO strings).
+
+    Answered from the (created_at, rule_version, failed_mask) covering index.
+    """
+    gap_sql, params = gap_predicate(load_rule_versions(conn), gap, alias='assessments')
+    sql = f"SELECT COUNT(*) FROM assessments WHERE {gap_sql}"
+    if since:
+        sql += " AND created_at >= ?"
+        params.append(since)
+    if until:
+        sql += " AND created_at < ?"
+        params.append(until)
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def reserve_ids(conn: sqlite3.Connection, count: int) -> range:
+    """Reserve `count` assessment ids by advancing the AUTOINCREMENT counter.
+
+    The bump happens in an IMMEDIATE transaction, so concurrent processes
+    sharing the DB file never hand out the same id. Rows inserted later with
+    an explicit id from this range keep the counter consistent.
+    """
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        row = cur.execute("SELECT seq FROM sqlite_sequence WHERE name='assessments'").fetchone()
+        if row is None:
+            start = cur.execute("SELECT MAX(id) FROM assessments").fetchone()[0] or 0
+            cur.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('assessments', ?)", (start + count,))
+        else:
+            start = row[0] or 0
+            cur.execute("UPDATE sqlite_sequence SET seq=? WHERE name='assessments'", (start + count,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return range(start + 1, start + count + 1)
+
+
+# --- Optional write-behind (group commit) mode ---
+class WriteBehindWriter:
+    """Queue assessments in memory and persist them from a background thread.
+
+    Rows are committed in one transaction per `batch_size` rows or every
+    `flush_interval` seconds, whichever comes first. Ids are reserved from the
+    DB in blocks so submit() can return the final assessment id immediately.
+    Rows that are queued but not yet committed remain readable via pending().
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 50, flush_interval: float = 0.05,
+                 max_queue: int = 10000):
+        self.db_path = db_path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._ids: List[int] = []
+        self._id_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._closed = False
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name='assessment-writer', daemon=True)
+        self._thread.start()
+
+    def _next_id(self) -> int:
+        with self._id_lock:
+            if not self._ids:
+                conn = sqlite3.connect(self.db_path, timeout=30)
+                try:
+                    self._ids = list(reserve_ids(conn, self.batch_size))
+                finally:
+                    conn.close()
+            return self._ids.pop(0)
+
+    def submit(self, result: dict, text: Optional[str] = None) -> int:
+        """Queue a result for persistence and return its assessment id."""
+        if self._closed:
+            raise RuntimeError("writer is closed")
+        aid = self._next_id()
+        row = build_row(result, aid=aid, text=text)
+        self._pending[aid] = {"created_at": row["created_at"], "result": result}
+        self._queue.put(row)
+        return aid
+
+    def pending(self, aid: int) -> Optional[Dict[str, Any]]:
+        """Return {created_at, result} for a queued but uncommitted id, else None."""
+        return self._pending.get(aid)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.depth(),
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+        }
+
+    def flush(self):
+        """Block until every row submitted so far has been committed (or dropped)."""
+        self._queue.join()
+
+    def close(self):
+        """Flush outstanding rows and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]):
+        for attempt in range(2):
+            try:
+                insert_rows(conn, batch)
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                if attempt == 0:
+                    time.sleep(0.05)
+                    continue
+                self.errors += 1
+                metrics.DB_ERRORS.inc('write_behind')
+                try:
+                    print(f"ERROR: write-behind batch of {len(batch)} assessments dropped: {e}")
+                except Exception:
+                    pass
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        try:
+            while not (self._stop.is_set() and self._queue.empty()):
+                batch = self._collect()
+                if not batch:
+                    continue
+                self._write(conn, batch)
+                for row in batch:
+                    self._pending.pop(row["id"], None)
+                    self._queue.task_done()
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    # Migrate an existing DB file in place: python assessment_store.py [path/to/assessments.db]
+    import sys
+    path = sys.argv[1] if len(sys.argv) > 1 else 'assessments.db'
+    conn = sqlite3.connect(path)
+    try:
+        init_schema(conn)
+        print(f"INFO: {path} is at schema version {conn.execute('PRAGMA user_version').fetchone()[0]}.")
+    finally:
+        conn.close()
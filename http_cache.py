@@ -0,0 +1,55 @@
+"""
+HTTP caching and compression helpers for the JSON API.
+
+- Cache-Control policies are looked up per route.
+- ETags are weak (W/"...") so one tag covers the identity, gzip and brotli
+  encodings of the same body; Werkzeug's make_conditional turns matching
+  If-None-Match / If-Modified-Since requests into 304s.
+- Bodies above a size threshold are compressed with brotli (when the optional
+  `brotli` package is installed and the client accepts it) or gzip.
+"""
+
+import gzip
+import hashlib
+
+try:
+    import brotli  # optional
+except Exception:
+    brotli = None
+
+
+def body_etag(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:20]
+
+
+def pick_encoding(accept_encodings) -> str:
+    """Best supported content coding the client accepts ('' for identity)."""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return ''
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def maybe_compress(response, accept_encodings, min_bytes: int, types=('application/json', 'text/')):
+    """Compress a buffered response in place if it's large enough and the client allows it."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or not (response.mimetype or '').startswith(types)):
+        return response
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = pick_encoding(accept_encodings)
+    if not encoding:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -1,5 +1,11 @@
 from typing import List
 import io
+import time
+
+import metrics
+
+UPLOAD_BYTES = metrics.histogram('qias_upload_bytes', 'Size of uploaded documents.', ('format',),
+                                 buckets=metrics.SIZE_BUCKETS)
 
 # Lightweight parsers for demo MVP; robust parsing may require additional libs/services.
 
@@ -55,15 +61,22 @@ def extract_text_from_files(named_files: List[tuple]) -> str:
     for name, data in named_files:
         lower = (name or '').lower()
         text = ''
+        started = time.perf_counter()
         if lower.endswith('.pdf'):
+            fmt = 'pdf'
             text = extract_text_from_pdf(data)
         elif lower.endswith('.docx'):
+            fmt = 'docx'
             text = extract_text_from_docx(data)
         elif lower.endswith('.txt'):
+            fmt = 'txt'
             text = extract_text_from_txt(data)
         else:
             # attempt utf-8 decode fallback
+            fmt = 'other'
             text = extract_text_from_txt(data)
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, 'parse_' + fmt)
+        UPLOAD_BYTES.observe(len(data or b''), fmt)
         if text:
             blobs.append(text)
     return '\n\n'.join(blobs)
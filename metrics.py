@@ -0,0 +1,227 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms keep one shard per thread: an update only touches the
+calling thread's own dict (no lock), and a scrape sums the shards. Shards of
+finished threads are folded into a base total so per-request threads don't
+accumulate. Callback metrics are evaluated at scrape time for values that
+already live elsewhere (cache hit counts, queue depths).
+
+    REQUESTS = metrics.counter('qias_http_requests_total', 'HTTP requests.', ('endpoint', 'status'))
+    REQUESTS.inc('/api/scorecard', '200')
+    STAGE_SECONDS.observe(0.012, 'extract')
+    body = metrics.render()
+
+Values are per process. Under a preforking server each worker keeps its own,
+so serve.py labels every sample with the worker's pid (set_constant_labels).
+"""
+
+import abc
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, Sequence
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1e3, 5e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 2e7)
+
+# Fold finished threads' shards once this many have been registered
+_FOLD_THRESHOLD = 64
+
+# Rendered labels added to every sample (see set_constant_labels)
+_constant = ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if _constant:
+        parts.append(_constant)
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _num(v) -> str:
+    if v == float('inf'):
+        return '+Inf'
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return repr(v) if isinstance(v, float) else str(v)
+
+
+class _Sharded(abc.ABC):
+    """Per-thread shards of {label values: value}; subclasses define how two values combine."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []   # (thread, shard dict)
+        self._base = {}     # totals folded from finished threads
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) > _FOLD_THRESHOLD:
+                    self._fold_dead()
+        return shard
+
+    def _fold_dead(self):
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                for key, value in shard.copy().items():
+                    self._merge(self._base, key, value)
+        self._shards = alive
+
+    def _snapshot(self) -> dict:
+        with self._lock:
+            self._fold_dead()
+            total = {}
+            for key, value in self._base.items():
+                self._merge(total, key, value)
+            for _, shard in self._shards:
+                for key, value in shard.copy().items():
+                    self._merge(total, key, value)
+        return total
+
+    @abc.abstractmethod
+    def _merge(self, into: dict, key, value):
+        """Add `value` into `into[key]`."""
+
+
+class Counter(_Sharded):
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        shard = getattr(self._local, 'shard', None) or self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, into, key, value):
+        into[key] = into.get(key, 0) + value
+
+    def samples(self) -> Iterable[str]:
+        for key, value in sorted(self._snapshot().items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {_num(value)}"
+
+
+class Histogram(_Sharded):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        shard = getattr(self._local, 'shard', None) or self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            # per-bucket counts (+Inf last), then sum
+            cell = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def _merge(self, into, key, value):
+        cell = into.get(key)
+        if cell is None:
+            into[key] = list(value)
+        else:
+            for i, v in enumerate(value):
+                cell[i] += v
+
+    def samples(self) -> Iterable[str]:
+        for key, cell in sorted(self._snapshot().items()):
+            running = 0
+            for bound, count in zip(self.buckets + (float('inf'),), cell):
+                running += count
+                le = f'le="{_num(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {running}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_num(cell[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {running}"
+
+
+class Callback:
+    """A metric whose samples are read from `fn()` at scrape time.
+
+    `fn` returns a number, or a dict of label-value tuples to numbers.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, fn: Callable, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[str]:
+        try:
+            values = self.fn()
+        except Exception:
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            if value is None:
+                continue
+            yield f"{self.name}{_labels(self.labelnames, key)} {_num(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def _add(self, metric):
+        with self._lock:
+            # Re-registering a name (module reload, second import) returns the existing metric
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, kind, fn, labelnames=()) -> Callback:
+        with self._lock:
+            metric = self._metrics[name] = Callback(name, help, kind, fn, labelnames)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.samples())
+        return '\n'.join(lines) + '\n'
+
+
+def set_constant_labels(**labels):
+    """Add these labels to every sample of every metric (e.g. worker="<pid>")."""
+    global _constant
+    _constant = ','.join(f'{n}="{_escape(v)}"' for n, v in sorted(labels.items()))
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+callback = REGISTRY.callback
+render = REGISTRY.render
+
+# Shared instruments (used from app, ai_extractor, ingest_utils and assessment_store)
+STAGE_SECONDS = histogram('qias_stage_seconds', 'Wall time of pipeline stages.', ('stage',))
+DB_ERRORS = counter('qias_db_errors_total', 'Database operations that failed (including swallowed errors).', ('op',))
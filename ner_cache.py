@@ -0,0 +1,134 @@
+"""
+Persistent cache of spaCy NER output, keyed by text hash.
+
+Re-running the archive after an extractor change shouldn't pay for nlp() on
+documents whose text hasn't changed. For each analysed text this stores the
+entities (character offsets and label) and the sentence spans, which is all
+the extractors read from a Doc, in a compact binary record:
+
+    header   '<BHII'  format version, label-table bytes, entity count, sentence count
+    labels   label names, NUL-separated (each distinct label once)
+    ents     '<I' triples: start, end, label index
+    sents    '<I' pairs: start, end
+
+zlib-compressed and stored in a small SQLite file. Entity text is recovered by
+slicing the original text, so nothing of the document itself is stored. The key
+includes the model name and version, so upgrading the model misses the old
+entries instead of reusing them.
+
+    python ner_cache.py ner_cache.db          # entry count and size
+    python ner_cache.py ner_cache.db --clear
+"""
+
+import hashlib
+import sqlite3
+import struct
+import sys
+import threading
+import zlib
+from typing import List, Optional, Tuple
+
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<BHII')
+
+Entity = Tuple[int, int, str]   # start char, end char, label
+Span = Tuple[int, int]          # start char, end char
+
+
+def text_key(text: str, model: str) -> str:
+    digest = hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+    return f"{model}:{digest}"
+
+
+def encode(ents: List[Entity], sents: List[Span]) -> bytes:
+    labels = list(dict.fromkeys(label for _, _, label in ents))
+    index = {label: i for i, label in enumerate(labels)}
+    label_bytes = '\0'.join(labels).encode('utf-8')
+    flat_ents = [v for start, end, label in ents for v in (start, end, index[label])]
+    flat_sents = [v for span in sents for v in span]
+    raw = (_HEADER.pack(FORMAT_VERSION, len(label_bytes), len(ents), len(sents)) + label_bytes
+           + struct.pack(f'<{len(flat_ents)}I', *flat_ents) + struct.pack(f'<{len(flat_sents)}I', *flat_sents))
+    return zlib.compress(raw, 6)
+
+
+def decode(blob: bytes) -> Tuple[List[Entity], List[Span]]:
+    raw = zlib.decompress(blob)
+    version, label_len, n_ents, n_sents = _HEADER.unpack_from(raw)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported NER cache record version {version}")
+    pos = _HEADER.size
+    labels = raw[pos:pos + label_len].decode('utf-8').split('\0') if label_len else []
+    pos += label_len
+    flat_ents = struct.unpack_from(f'<{3 * n_ents}I', raw, pos)
+    pos += 12 * n_ents
+    flat_sents = struct.unpack_from(f'<{2 * n_sents}I', raw, pos)
+    ents = [(flat_ents[i], flat_ents[i + 1], labels[flat_ents[i + 2]]) for i in range(0, len(flat_ents), 3)]
+    sents = [(flat_sents[i], flat_sents[i + 1]) for i in range(0, len(flat_sents), 2)]
+    return ents, sents
+
+
+class NerCache:
+    """Text-hash -> encoded NER record store in SQLite (safe to share between processes)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS ner_cache (key TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.DatabaseError:
+                pass
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[List[Entity], List[Span]]]:
+        try:
+            row = self._conn().execute("SELECT data FROM ner_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                record = decode(row[0])
+                self.hits += 1
+                return record
+        except (sqlite3.Error, ValueError, zlib.error, struct.error):
+            pass
+        self.misses += 1
+        return None
+
+    def put(self, key: str, ents: List[Entity], sents: List[Span]):
+        try:
+            conn = self._conn()
+            conn.execute("INSERT OR REPLACE INTO ner_cache (key, data) VALUES (?, ?)", (key, encode(ents, sents)))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"WARN: Could not write NER cache entry: {e}")
+
+    def stats(self) -> dict:
+        try:
+            count, size = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM ner_cache").fetchone()
+        except sqlite3.Error:
+            count, size = None, None
+        return {"entries": count, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM ner_cache")
+        conn.commit()
+        conn.execute("VACUUM")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python ner_cache.py path/to/ner_cache.db [--clear]")
+        sys.exit(2)
+    cache = NerCache(sys.argv[1])
+    if '--clear' in sys.argv[2:]:
+        cache.clear()
+    print(cache.stats())
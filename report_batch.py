@@ -0,0 +1,162 @@
+"""
+Batch report generation streamed as a ZIP archive.
+
+Reports are rendered across a process pool with build_pdf_from_result and
+appended to a zipfile writing into an unseekable sink; after each PDF the
+bytes produced so far are handed to the caller, so the archive is never held
+in memory as a whole. At most `window` renders are in flight, which bounds
+memory even when the client reads slowly.
+
+A server passes shared_pool(): one process pool for the life of the
+process, so a request doesn't pay for forking (and tearing down) workers.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from report_renderer import build_pdf_from_result
+
+# (archive name, payload): payload is a result dict to render, ready PDF bytes,
+# or None when the assessment doesn't exist.
+ReportItem = Tuple[str, Union[dict, bytes, None]]
+
+
+class _ChunkSink:
+    """Write-only file object; zipfile falls back to streaming mode for it."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        out = b''.join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _new_pool(workers: int) -> ProcessPoolExecutor:
+    # Render processes start from a forkserver (spawn where there is none):
+    # forking the threaded server would copy whatever locks its other threads hold.
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+def shared_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """The process-wide render pool, created with `workers` processes on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _new_pool(workers or os.cpu_count() or 1)
+        return _pool
+
+
+def shutdown_pool(pool: Optional[ProcessPoolExecutor] = None):
+    """Shut the shared pool down (only if it is still `pool`, when given); the next use starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or (pool is not None and pool is not _pool):
+            return
+        old, _pool = _pool, None
+    old.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_pool)
+
+
+def _render(name: str, result: dict):
+    return name, build_pdf_from_result(result), True
+
+
+def _rendered(items: Iterable[ReportItem], workers: int, window: int,
+              pool: Optional[ProcessPoolExecutor] = None) -> Iterator[Tuple[str, Optional[bytes], bool]]:
+    """Yield (name, pdf or None, freshly rendered) in completion order, rendering dicts in a pool."""
+    if pool is not None:
+        try:
+            yield from _submit_all(pool, items, window)
+        except BrokenProcessPool:
+            shutdown_pool(pool)  # a render process died; replace the pool for later requests
+            raise
+        return
+    if workers <= 1:
+        for name, payload in items:
+            if isinstance(payload, dict):
+                yield _render(name, payload)
+            else:
+                yield name, payload, False
+        return
+    with _new_pool(workers) as own:
+        yield from _submit_all(own, items, window)
+
+
+def _submit_all(pool: ProcessPoolExecutor, items: Iterable[ReportItem], window: int):
+    running = set()
+    try:
+        for name, payload in items:
+            if not isinstance(payload, dict):
+                yield name, payload, False
+                continue
+            running.add(pool.submit(_render, name, payload))
+            if len(running) >= window:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield fut.result()
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield fut.result()
+    finally:
+        # Client went away (generator closed): don't leave this request's renders queued
+        for fut in running:
+            fut.cancel()
+
+
+def iter_report_zip(items: Iterable[ReportItem], workers: Optional[int] = None, window: Optional[int] = None,
+                    on_rendered: Optional[Callable[[str, bytes], None]] = None,
+                    pool: Optional[ProcessPoolExecutor] = None) -> Iterator[bytes]:
+    """Yield a ZIP archive of PDF reports chunk by chunk.
+
+    Missing or failed reports are listed in a trailing `errors.txt` entry
+    instead of aborting the stream. `on_rendered(name, pdf)` is called for
+    every freshly rendered PDF (e.g. to populate the report cache). Renders
+    run in `pool` when given, else in a pool of `workers` processes created
+    for this archive (in-process when workers is 1).
+    """
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 2
+    sink = _ChunkSink()
+    errors = []
+    stamp = time.localtime()[:6]
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for name, pdf, fresh in _rendered(items, workers, window, pool):
+            if not pdf:
+                errors.append(name)
+                continue
+            if fresh and on_rendered is not None:
+                try:
+                    on_rendered(name, pdf)
+                except Exception:
+                    pass
+            # PDF page streams are already deflated, so entries are stored as-is
+            zf.writestr(zipfile.ZipInfo(name, date_time=stamp), pdf)
+            yield sink.drain()
+        if errors:
+            zf.writestr(zipfile.ZipInfo('errors.txt', date_time=stamp),
+                        "Reports that could not be generated:\n" + "\n".join(errors) + "\n")
+    yield sink.drain()
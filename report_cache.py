@@ -0,0 +1,112 @@
+"""
+On-disk cache of rendered PDF reports.
+
+Stored assessments never change, so a report is fully determined by the
+assessment ID, the rules/resources it was rendered against and the report
+template. Those three make up the cache key; the key also serves as the ETag.
+Files are written atomically and the directory is kept under a byte budget by
+evicting the least recently served reports (file mtime is bumped on each hit).
+"""
+
+import os
+import threading
+from typing import Optional
+
+
+def report_key(aid: int, rules_version: str, template_version: str) -> str:
+    return f"a{int(aid)}-r{rules_version}-t{template_version}"
+
+
+class ReportCache:
+    """Size-bounded directory of `<key>.pdf` files."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total = None  # bytes on disk, computed lazily on first put
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.pdf')
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached file path for `key`, or None on a miss."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)  # LRU: most recently served last to go
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, pdf: bytes) -> Optional[str]:
+        """Store `pdf` under `key` and return its path (None if it can't be cached)."""
+        if not pdf or len(pdf) > self.max_bytes:
+            return None
+        path = self.path_for(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                f.write(pdf)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"WARN: Could not cache report {key}: {e}")
+            try: os.remove(tmp)
+            except OSError: pass
+            return None
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan_size()
+            else:
+                self._total += len(pdf)
+            if self._total > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "bytes": self._total, "max_bytes": self.max_bytes}
+
+    def _entries(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith('.pdf'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self, keep: str):
+        """Drop least recently served files until the directory fits the budget."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% so a full cache doesn't rescan on every put
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total = total
@@ -0,0 +1,163 @@
+"""
+PDF rendering of readiness reports (reportlab).
+
+The page chrome (purple header bar, title, footers) is drawn once per document
+as reportlab form XObjects and referenced from every page with doForm(). Body
+rows are laid out in a single pass into pages of rectangles and text lines
+before anything is drawn, so the renderer knows up front which page is last
+(it gets the contact footer) and each page is emitted as one text object.
+"""
+
+import io
+
+CM = 72 / 2.54  # reportlab.lib.units.cm, without importing reportlab for layout
+
+TITLE = "QDB Regulatory Readiness Report"
+SUBTITLE = "Generated by QIAS — MVP"
+FOOTER = "Qatar Development Bank — Demo report. For advisory purposes only."
+FOOTER_LAST = "Qatar Development Bank — Contact: info@qdb.qa (placeholder)"
+
+PURPLE = '#5C2D91'
+STRIPE = '#F5F0FF'
+GREY = '#666666'
+
+# Layout (A4 points)
+PAGE_WIDTH, PAGE_HEIGHT = 595.2755905511812, 841.8897637795277
+LEFT = 2 * CM
+BODY_TOP = PAGE_HEIGHT - 3.2 * CM
+BREAKDOWN_BOTTOM = 2.5 * CM
+BODY_BOTTOM = 2 * CM
+
+
+class _Page:
+    __slots__ = ('rects', 'lines')
+
+    def __init__(self):
+        self.rects = []   # (x, y, w, h) stripe backgrounds
+        self.lines = []   # (font, size, colour, x, y, text)
+
+
+def layout_report(result: dict, max_breakdown_rows=30, max_recommendations=20) -> list:
+    """Place every row of the report on a page; returns a list of _Page.
+
+    `max_breakdown_rows` / `max_recommendations` cap the lists (None renders all).
+    """
+    pages = [_Page()]
+    page = pages[0]
+    y = BODY_TOP
+
+    def new_page():
+        nonlocal page, y
+        page = _Page()
+        pages.append(page)
+        y = BODY_TOP
+
+    def text(font, size, s, x=LEFT, colour='black'):
+        page.lines.append((font, size, colour, x, y, s))
+
+    page.lines.append(("Helvetica", 11, 'white', LEFT, PAGE_HEIGHT - 1.8 * CM, SUBTITLE))
+    text("Helvetica", 11, f"Score: {result.get('readiness_score', 0)} / 100")
+    y -= 0.6 * CM
+    failed = ", ".join(result.get('failed_gaps', [])) or "None"
+    text("Helvetica", 11, f"Failed Gaps: {failed}")
+    y -= 0.9 * CM
+    text("Helvetica-Bold", 12, "Score Breakdown")
+    y -= 0.6 * CM
+
+    alt = False
+    for row in result.get('score_breakdown', [])[:max_breakdown_rows]:
+        if alt:
+            page.rects.append((LEFT - 0.3 * CM, y - 0.2 * CM, PAGE_WIDTH - 3.4 * CM, 0.7 * CM))
+        line = f"{row.get('check')}: {row.get('status')} (weight {round(row.get('weight', 0))}, contrib {round(row.get('score_contribution', 0))})"
+        text("Helvetica", 10, line[:110])
+        y -= 0.55 * CM
+        alt = not alt
+        if y < BREAKDOWN_BOTTOM:
+            new_page()
+
+    y -= 0.4 * CM
+    if y < BREAKDOWN_BOTTOM:
+        new_page()
+    text("Helvetica-Bold", 12, "Recommendations")
+    y -= 0.6 * CM
+    for rec in result.get('recommendations', [])[:max_recommendations]:
+        text("Helvetica", 10, f"- {rec.get('gap')}")
+        y -= 0.5 * CM
+        for r in rec.get('resources', [])[:3]:
+            title = r.get('title') or r.get('name') or 'Resource'
+            typ = r.get('type') or ''
+            text("Helvetica", 10, f"• {title} ({typ})", x=LEFT + 0.5 * CM)
+            y -= 0.45 * CM
+            if y < BODY_BOTTOM:
+                new_page()
+        y -= 0.2 * CM
+        if y < BODY_BOTTOM:
+            new_page()
+    # A trailing break leaves an empty page; drop it so the contact footer lands on content
+    if len(pages) > 1 and not pages[-1].lines:
+        pages.pop()
+    return pages
+
+
+def _define_forms(c, colors):
+    """Draw the shared page chrome once as form XObjects."""
+    c.beginForm('header')
+    c.setFillColor(colors.HexColor(PURPLE))
+    c.rect(0, PAGE_HEIGHT - 2.5 * CM, PAGE_WIDTH, 2.5 * CM, fill=1, stroke=0)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(LEFT, PAGE_HEIGHT - 1.3 * CM, TITLE)
+    c.endForm()
+    for name, footer in (('footer', FOOTER), ('footer_last', FOOTER_LAST)):
+        c.beginForm(name)
+        c.setFont("Helvetica", 9)
+        c.setFillColor(colors.HexColor(GREY))
+        c.drawString(LEFT, 1.5 * CM, footer)
+        c.endForm()
+
+
+def build_pdf_from_result(result: dict, max_breakdown_rows=30, max_recommendations=20) -> bytes:
+    """Create a PDF report using reportlab (empty bytes on failure)."""
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        from reportlab.lib import colors
+        pages = layout_report(result, max_breakdown_rows=max_breakdown_rows,
+                              max_recommendations=max_recommendations)
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+        _define_forms(c, colors)
+        palette = {'black': colors.black, 'white': colors.white}
+        stripe = colors.HexColor(STRIPE)
+        last = len(pages) - 1
+        for i, page in enumerate(pages):
+            c.doForm('header')
+            if page.rects:
+                c.setFillColor(stripe)
+                for x, y, w, h in page.rects:
+                    c.rect(x, y, w, h, fill=1, stroke=0)
+            t = c.beginText()
+            state = origin = None
+            for font, size, colour, x, y, s in page.lines:
+                if (font, size, colour) != state:
+                    t.setFont(font, size)
+                    t.setFillColor(palette[colour])
+                    state = (font, size, colour)
+                # Relative line moves (Td) are much shorter than absolute origins (Tm)
+                if origin is None:
+                    t.setTextOrigin(x, y)
+                else:
+                    t.moveCursor(x - origin[0], origin[1] - y)
+                origin = (x, y)
+                t.textOut(s)
+            c.drawText(t)
+            c.doForm('footer_last' if i == last else 'footer')
+            c.showPage()
+        c.save()
+        return buffer.getvalue()
+    except Exception as e:
+        try:
+            print(f"ERROR: Failed generating PDF: {e}")
+        except Exception:
+            pass
+        return b""
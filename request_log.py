@@ -0,0 +1,141 @@
+"""
+Per-request resource accounting written to a size-rotated JSON-lines log.
+
+Each record holds wall and CPU time, RSS before/after, the peak traced Python
+allocation (when tracemalloc tracing is on), input bytes and extracted-text
+length. tracemalloc and RSS are process-wide, so with several requests in
+flight the memory figures overlap; `in_flight` is recorded so the worst
+offenders can be read in context.
+
+Rotation renames files, which only works with one writer per file: serve.py
+workers call open_for_worker() after fork and each log to worker_path(path,
+pid). log_files() and iter_records() read the per-worker files too.
+
+    python scripts/request_report.py --by memory --top 20
+"""
+
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import tracemalloc
+from typing import Iterator, List, Optional
+
+_PAGE_KB = os.sysconf('SC_PAGE_SIZE') // 1024 if hasattr(os, 'sysconf') else 4
+
+
+def current_rss_kb() -> Optional[int]:
+    """Resident set size of this process in KiB (None where /proc isn't available)."""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_KB
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RequestLog:
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backups: int = 5, trace_memory: bool = False):
+        self.path = path
+        self.trace_memory = trace_memory
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._max_bytes, self._backups = max_bytes, backups
+        self._logger = logging.getLogger(f'qias.request_log.{path}')
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        if not self._logger.handlers:
+            self._open(path)
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _open(self, path: str):
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+            handler.close()
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=self._max_bytes, backupCount=self._backups,
+                                                       encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self._logger.addHandler(handler)
+
+    def open_for_worker(self, pid: int):
+        """Switch a forked worker to its own file, so no two processes rotate the same one."""
+        with self._lock:
+            self._in_flight = 0
+        self._open(worker_path(self.path, pid))
+
+    def begin(self) -> dict:
+        """Snapshot counters at the start of a request."""
+        with self._lock:
+            self._in_flight += 1
+            in_flight = self._in_flight
+            if self.trace_memory and in_flight == 1:
+                tracemalloc.reset_peak()
+        return {
+            "wall": time.perf_counter(),
+            "cpu": time.thread_time(),
+            "rss": current_rss_kb(),
+            "traced": tracemalloc.get_traced_memory()[0] if self.trace_memory else None,
+            "in_flight": in_flight,
+        }
+
+    def end(self, start: dict, **fields) -> dict:
+        """Write one record for a request started with begin(); extra fields are included as-is."""
+        rss = current_rss_kb()
+        record = {"ts": time.strftime('%Y-%m-%dT%H:%M:%S'), **fields}
+        record["wall_ms"] = round((time.perf_counter() - start["wall"]) * 1000, 2)
+        record["cpu_ms"] = round((time.thread_time() - start["cpu"]) * 1000, 2)
+        record["rss_kb"] = rss
+        record["rss_delta_kb"] = rss - start["rss"] if rss is not None and start["rss"] is not None else None
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            record["py_peak_kb"] = max(0, (peak - start["traced"]) // 1024)
+        record["in_flight"] = start["in_flight"]
+        with self._lock:
+            self._in_flight -= 1
+        try:
+            self._logger.info(json.dumps(record, separators=(',', ':')))
+        except Exception:
+            pass
+        return record
+
+
+def worker_path(path: str, pid: int) -> str:
+    """The log of one serve.py worker: logs/requests.log.jsonl -> logs/requests.log.worker-<pid>.jsonl."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.worker-{pid}{ext}"
+
+
+def _with_backups(path: str) -> List[str]:
+    files = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        files.append(f"{path}.{i}")
+        i += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def log_files(path: str) -> List[str]:
+    """The log and its rotated backups, oldest first, after those of any per-worker logs."""
+    root, ext = os.path.splitext(path)
+    workers = sorted(p for p in glob.glob(f"{glob.escape(root)}.worker-*{glob.escape(ext)}")
+                     if p[len(root) + 8:len(p) - len(ext)].isdigit())
+    return [name for base in workers + [path] for name in _with_backups(base)]
+
+
+def iter_records(path: str) -> Iterator[dict]:
+    for name in log_files(path):
+        with open(name, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
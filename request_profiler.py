@@ -0,0 +1,112 @@
+"""
+Opt-in cProfile of individual requests.
+
+A request is profiled when it carries the admin header with the configured
+token, or when it is picked by the sampling rate. The profile is written to
+`<directory>/<name>.pstats` (open with `python -m pstats` or snakeviz) and a
+plain-text summary of the hottest functions is written next to it. With no
+token and a zero sampling rate, `wants()` is a couple of attribute checks.
+
+cProfile hooks the whole interpreter, not one thread: a profile covers
+everything the process ran while it was active, including other requests
+served concurrently, so read it as "the process during this request". Only
+one profile runs at a time (from Python 3.12 a second profiler can't even be
+enabled); a request that wants a profile while another is being taken is
+served unprofiled.
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from typing import List, Optional, Tuple
+
+# Process-wide, shared by every RequestProfiler: cProfile can't nest
+_ACTIVE = threading.Lock()
+
+
+class RequestProfiler:
+    HEADER = 'X-Profile-Token'
+
+    def __init__(self, directory: str, token: str = '', sample_rate: float = 0.0, top: int = 15):
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.top = top
+        self.profiled = 0
+        self.skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) or self.sample_rate > 0
+
+    def wants(self, headers) -> bool:
+        """Whether the current request should be profiled."""
+        sent = headers.get(self.HEADER)
+        # Constant-time comparison, so response timing doesn't leak the token
+        if self.token and sent is not None and hmac.compare_digest(sent.encode('utf-8', 'replace'),
+                                                                   self.token.encode('utf-8')):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Start a profile, or return None when one is already running."""
+        if not _ACTIVE.acquire(blocking=False):
+            self.skipped += 1
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool (sys.monitoring, a debugger) is active
+            _ACTIVE.release()
+            self.skipped += 1
+            return None
+        return profiler
+
+    def cancel(self, profiler: cProfile.Profile):
+        """Stop `profiler` without saving it (the request ended without a response)."""
+        profiler.disable()
+        _ACTIVE.release()
+
+    def finish(self, profiler: cProfile.Profile, label: str) -> Tuple[Optional[str], List[dict]]:
+        """Stop `profiler`, save it and return (profile name, top functions by own time)."""
+        profiler.disable()
+        _ACTIVE.release()
+        self.profiled += 1
+        stats = pstats.Stats(profiler)
+        top = hot_functions(stats, self.top)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_') or 'request'
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{slug}-{os.getpid()}-{self.profiled}"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stats.dump_stats(os.path.join(self.directory, name + '.pstats'))
+            with open(os.path.join(self.directory, name + '.txt'), 'w', encoding='utf-8') as f:
+                f.write(f"{label}\n\n")
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats('tottime').print_stats(self.top)
+                f.write(out.getvalue())
+        except OSError as e:
+            print(f"WARN: Could not write profile {name}: {e}")
+            return None, top
+        return name, top
+
+
+def hot_functions(stats: pstats.Stats, limit: int) -> List[dict]:
+    """Top `limit` functions by own (exclusive) time."""
+    rows = []
+    for (filename, line, func), (cc, nc, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": func,
+            "location": f"{os.path.basename(filename)}:{line}" if line else filename,
+            "calls": nc,
+            "own_ms": round(tottime * 1000, 3),
+            "cumulative_ms": round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda r: r["own_ms"], reverse=True)
+    return rows[:limit]
@@ -0,0 +1,69 @@
+"""
+Render PDF reports for many stored assessments into one ZIP archive.
+
+Usage:
+    python scripts/batch_reports.py --ids 12,13,14 --out reports.zip
+    python scripts/batch_reports.py --since 2025-10-01 --until 2025-11-01 --workers 8 --out october.zip
+    python scripts/batch_reports.py --gap "Capital Shortfall" --out - > reports.zip
+
+Reports are rendered across a process pool and appended to the archive as each
+one finishes (the same code path as POST /api/reports/batch), so the archive is
+never held in memory. Already-cached reports are reused and new ones cached.
+"""
+
+import os
+import sys
+import argparse
+import sqlite3
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-render assessment reports into a ZIP archive.")
+    parser.add_argument('--db', default=app.DB_PATH, help="Path to the assessments DB")
+    parser.add_argument('--ids', help="Comma-separated assessment IDs (otherwise the filters below apply)")
+    parser.add_argument('--since', help="Only assessments with created_at >= this ISO date/timestamp")
+    parser.add_argument('--until', help="Only assessments with created_at < this ISO date/timestamp")
+    parser.add_argument('--min-score', type=int)
+    parser.add_argument('--max-score', type=int)
+    parser.add_argument('--gap', help="Only assessments that failed this check")
+    parser.add_argument('--jurisdiction', help="Only assessments storing data in this location")
+    parser.add_argument('--limit', type=int, default=app.BATCH_REPORT_MAX, help="Maximum number of reports")
+    parser.add_argument('--workers', type=int, default=None, help="Render processes (default: CPU count)")
+    parser.add_argument('--out', default='readiness_reports.zip', help="Output ZIP path, or - for stdout")
+    args = parser.parse_args(argv)
+
+    app.DB_PATH = args.db
+    ids = [i.strip() for i in args.ids.split(',') if i.strip()] if args.ids else None
+    filters = {k: v for k, v in {
+        'since': args.since, 'until': args.until, 'min_score': args.min_score, 'max_score': args.max_score,
+        'gap': args.gap, 'jurisdiction': args.jurisdiction,
+    }.items() if v is not None}
+    conn = sqlite3.connect(args.db)
+    try:
+        resolved = app.resolve_report_ids(conn, ids, filters, limit=args.limit)
+    finally:
+        conn.close()
+    if not resolved:
+        print("No assessments matched.", file=sys.stderr)
+        return 1
+
+    out = sys.stdout.buffer if args.out == '-' else open(args.out, 'wb')
+    size = 0
+    try:
+        for chunk in app.iter_batch_report_zip(resolved, workers=args.workers):
+            out.write(chunk)
+            size += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"Wrote {len(resolved)} reports ({size} bytes).", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
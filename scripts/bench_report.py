@@ -0,0 +1,71 @@
+"""
+Benchmark PDF report rendering on a large synthetic assessment.
+
+Usage:
+    python scripts/bench_report.py                 # 500-check breakdown, 200 recommendations
+    python scripts/bench_report.py --checks 2000 --repeat 20
+
+Renders every row (no breakdown/recommendation caps) and prints the median
+render time, PDF size and page count.
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_renderer import build_pdf_from_result, layout_report
+
+
+def synthetic_result(checks: int, recommendations: int) -> dict:
+    breakdown = []
+    for i in range(checks):
+        failed = i % 3 == 0
+        breakdown.append({
+            "check": f"Check {i:04d} — synthetic regulatory requirement",
+            "status": "FAIL" if failed else "PASS",
+            "weight": 2.5,
+            "score_contribution": 0 if failed else 2.5,
+        })
+    recs = [{
+        "gap": f"Check {i:04d} — synthetic regulatory requirement",
+        "resources": [{"type": "Compliance Expert", "name": f"Expert {j}"} for j in range(3)],
+    } for i in range(recommendations)]
+    return {
+        "readiness_score": 66,
+        "failed_gaps": [r["gap"] for r in recs[:10]],
+        "score_breakdown": breakdown,
+        "recommendations": recs,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark build_pdf_from_result.")
+    parser.add_argument('--checks', type=int, default=500, help="Rows in the score breakdown")
+    parser.add_argument('--recommendations', type=int, default=200, help="Recommendation entries")
+    parser.add_argument('--repeat', type=int, default=10, help="Timed renders (median reported)")
+    args = parser.parse_args(argv)
+
+    result = synthetic_result(args.checks, args.recommendations)
+    build_pdf_from_result(result, max_breakdown_rows=None, max_recommendations=None)  # warm-up (font/module setup)
+    timings = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        pdf = build_pdf_from_result(result, max_breakdown_rows=None, max_recommendations=None)
+        timings.append(time.perf_counter() - t0)
+    if not pdf:
+        print("ERROR: rendering failed (is reportlab installed?)")
+        return 1
+    pages = len(layout_report(result, max_breakdown_rows=None, max_recommendations=None))
+    print(f"checks={args.checks} recommendations={args.recommendations} pages={pages}")
+    print(f"render median={statistics.median(timings) * 1000:.1f} ms  min={min(timings) * 1000:.1f} ms")
+    print(f"pdf size={len(pdf)} bytes ({len(pdf) / pages:.0f} bytes/page)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
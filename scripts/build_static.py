@@ -0,0 +1,143 @@
+"""
+Build fingerprinted, precompressed frontend assets.
+
+Usage:
+    python scripts/build_static.py            # static/ -> static/dist/
+
+Minifies static/app.js, static/styles.css and static/index.html, renames the
+JS/CSS to content-hashed names (app.<hash>.js, styles.<hash>.css), rewrites the
+references in index.html, and writes .gz (and .br when the optional `brotli`
+package is installed) next to every file. The Flask app serves static/dist/
+when it exists: hashed assets with immutable caching, index.html revalidated
+by ETag. Re-run after editing anything in static/.
+
+The minifiers are deliberately conservative (comments and indentation only,
+line structure kept) so they can't change behaviour without a JS/CSS parser.
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+
+try:
+    import brotli  # optional
+except Exception:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HASHED_ASSETS = ('app.js', 'styles.css')
+
+
+def minify_css(css: str) -> str:
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css)
+    css = css.replace(';}', '}')
+    return css.strip() + '\n'
+
+
+def minify_js(js: str) -> str:
+    """Drop indentation, blank lines and whole-line comments; template literals are left untouched."""
+    out = []
+    in_template = False
+    in_block_comment = False
+    for line in js.splitlines():
+        if in_template:
+            out.append(line)
+        else:
+            stripped = line.strip()
+            if in_block_comment:
+                in_block_comment = '*/' not in stripped
+                continue
+            if not stripped or stripped.startswith('//'):
+                continue
+            if stripped.startswith('/*'):
+                in_block_comment = '*/' not in stripped
+                continue
+            out.append(stripped)
+        # Unescaped backticks toggle template-literal state across lines
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(out) + '\n'
+
+
+def minify_html(html: str) -> str:
+    html = re.sub(r'<!--.*?-->', '', html, flags=re.S)
+    out = []
+    preserve = False
+    for line in html.splitlines():
+        if preserve:
+            out.append(line)
+        elif line.strip():
+            out.append(line.strip())
+        opened = re.search(r'<(pre|textarea)\b', line, re.I)
+        closed = re.search(r'</(pre|textarea)>', line, re.I)
+        if opened and not closed:
+            preserve = True
+        elif closed:
+            preserve = False
+    return '\n'.join(out) + '\n'
+
+
+def _write(path: str, data: bytes, written: list):
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+    written.append(os.path.basename(path))
+
+
+def build(static_dir: str, out_dir: str) -> dict:
+    """Build static_dir into out_dir; returns the manifest (source name -> built name)."""
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    minifiers = {'.js': minify_js, '.css': minify_css}
+    manifest, written = {}, []
+    for name in HASHED_ASSETS:
+        with open(os.path.join(static_dir, name), 'r', encoding='utf-8') as f:
+            stem, ext = os.path.splitext(name)
+            data = minifiers[ext](f.read()).encode('utf-8')
+        built = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        _write(os.path.join(out_dir, built), data, written)
+        manifest[name] = built
+    with open(os.path.join(static_dir, 'index.html'), 'r', encoding='utf-8') as f:
+        html = f.read()
+    for name, built in manifest.items():
+        html = html.replace(f'/static/{name}', f'/static/dist/{built}')
+    _write(os.path.join(out_dir, 'index.html'), minify_html(html).encode('utf-8'), written)
+    manifest['index.html'] = 'index.html'
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Minify, fingerprint and precompress static assets.")
+    parser.add_argument('--static', default=os.path.join(ROOT, 'static'), help="Source directory")
+    parser.add_argument('--out', default=None, help="Output directory (default: <static>/dist)")
+    args = parser.parse_args(argv)
+    out_dir = args.out or os.path.join(args.static, 'dist')
+    manifest = build(args.static, out_dir)
+    for name, built in manifest.items():
+        src = os.path.getsize(os.path.join(args.static, name))
+        sizes = [f"{os.path.getsize(os.path.join(out_dir, built))} B"]
+        sizes.append(f"gz {os.path.getsize(os.path.join(out_dir, built + '.gz'))} B")
+        if brotli is not None:
+            sizes.append(f"br {os.path.getsize(os.path.join(out_dir, built + '.br'))} B")
+        print(f"{name} ({src} B) -> {built}: {', '.join(sizes)}")
+    if brotli is None:
+        print("NOTE: brotli not installed; only .gz variants were written.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
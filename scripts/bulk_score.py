@@ -0,0 +1,224 @@
+"""
+Bulk offline scoring of archived application packs.
+
+Usage:
+    python scripts/bulk_score.py path/to/archive/ --workers 4
+    python scripts/bulk_score.py packs.ndjson --db assessments.db --batch-size 200
+
+The source is either a directory (every .pdf/.docx/.txt file below it is one
+document) or an NDJSON manifest with one object per line:
+    {"id": "pack-0001", "path": "archive/pack-0001.pdf"}
+    {"id": "pack-0002", "text": "Paid-Up Capital: ..."}
+
+Documents are parsed and scored across a process pool with the same
+ingest_utils / ai_extractor / app scoring code the API uses. Results are
+written to the assessments DB in batched transactions, and each batch records
+its items in a `bulk_checkpoint` table in the same transaction, so an
+interrupted run can simply be restarted and skips everything already stored.
+
+Pass --ner-cache ner_cache.db to keep spaCy's entities per text hash: when the
+archive is re-scored after an extractor change, unchanged documents are
+re-extracted from the cache and only the regex extractors run.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import sqlite3
+from datetime import datetime
+from multiprocessing import Pool
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import assessment_store
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+CHECKPOINT_DDL = (
+    "CREATE TABLE IF NOT EXISTS bulk_checkpoint ("
+    "item_key TEXT PRIMARY KEY, assessment_id INTEGER, finished_at TEXT NOT NULL)"
+)
+
+
+# --- Work item discovery ---
+def iter_directory(root: str):
+    """Yield one work item per supported file, in a stable order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, name)
+            st = os.stat(path)
+            rel = os.path.relpath(path, root).replace(os.sep, '/')
+            # Size and mtime in the key so a replaced file is scored again
+            yield {"key": f"{rel}:{st.st_size}:{st.st_mtime_ns}", "path": path}
+
+
+def iter_manifest(manifest: str):
+    """Yield work items from an NDJSON manifest (relative paths resolve against its folder)."""
+    base = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest, 'r', encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                print(f"WARN: {manifest}:{lineno} is not valid JSON; skipped.", file=sys.stderr)
+                continue
+            item = {"key": str(obj.get('id') or obj.get('path') or f"line:{lineno}")}
+            if obj.get('text') is not None:
+                item["text"] = obj['text']
+            elif obj.get('path'):
+                item["path"] = obj['path'] if os.path.isabs(obj['path']) else os.path.join(base, obj['path'])
+            else:
+                print(f"WARN: {manifest}:{lineno} has neither 'path' nor 'text'; skipped.", file=sys.stderr)
+                continue
+            yield item
+
+
+def iter_items(source: str):
+    if os.path.isdir(source):
+        return iter_directory(source)
+    return iter_manifest(source)
+
+
+# --- Worker side ---
+_app = None
+
+
+def _init_worker(ner_cache_path: str = None):
+    """Import the scoring code (and spaCy model) once per worker process.
+
+    With an NER cache the model is left to load on the first cache miss, so
+    re-scoring an already analysed archive never loads it.
+    """
+    global _app
+    import app as app_module
+    if ner_cache_path:
+        app_module.ai_extractor.set_ner_cache(ner_cache_path)
+    app_module.warmup(nlp=not ner_cache_path)
+    _app = app_module
+
+
+def score_item(item: dict):
+    """Parse and score one document; returns (key, row, error)."""
+    key = item["key"]
+    try:
+        text = item.get("text")
+        if text is None:
+            from ingest_utils import extract_text_from_files
+            with open(item["path"], 'rb') as f:
+                text = extract_text_from_files([(os.path.basename(item["path"]), f.read())])
+        if not text or not text.strip():
+            return key, None, "no text extracted"
+        result = _app.score_extracted(_app.run_extraction(text))
+        return key, assessment_store.build_row(result, text=text), None
+    except Exception as e:
+        return key, None, str(e)
+
+
+# --- Writer side ---
+def load_done(conn: sqlite3.Connection) -> set:
+    return {row[0] for row in conn.execute("SELECT item_key FROM bulk_checkpoint")}
+
+
+def write_batch(conn: sqlite3.Connection, batch: list):
+    """Insert a batch of (key, row) and checkpoint their keys in one transaction."""
+    rows = [row for _, row in batch]
+    conn.execute("BEGIN IMMEDIATE")
+    last_id = assessment_store.insert_rows(conn, rows, commit=False)
+    # insert_rows numbers id-less rows consecutively, ending at last_id
+    first_id = last_id - len(rows) + 1
+    now = datetime.utcnow().isoformat()
+    conn.executemany(
+        "INSERT OR REPLACE INTO bulk_checkpoint (item_key, assessment_id, finished_at) VALUES (?,?,?)",
+        [(key, first_id + i, now) for i, (key, _) in enumerate(batch)],
+    )
+    conn.commit()
+
+
+def run(source: str, db_path: str = 'assessments.db', workers: int = None, batch_size: int = 100,
+        progress_every: int = 100, quiet: bool = False, ner_cache: str = None) -> dict:
+    """Score every not-yet-checkpointed item in `source`; returns run statistics."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    assessment_store.init_schema(conn)
+    conn.execute(CHECKPOINT_DDL)
+    conn.commit()
+    done = load_done(conn)
+    skipped = 0
+
+    def pending():
+        nonlocal skipped
+        for item in iter_items(source):
+            if item["key"] in done:
+                skipped += 1
+                continue
+            yield item
+
+    stats = {"scored": 0, "failed": 0, "skipped": 0, "seconds": 0.0, "docs_per_sec": 0.0}
+    batch = []
+    started = time.perf_counter()
+
+    def report(final=False):
+        elapsed = time.perf_counter() - started
+        rate = stats["scored"] / elapsed if elapsed > 0 else 0.0
+        stats.update(seconds=round(elapsed, 2), docs_per_sec=round(rate, 2), skipped=skipped)
+        if not quiet:
+            label = "Done" if final else "Progress"
+            print(f"{label}: {stats['scored']} scored, {stats['failed']} failed, {skipped} already done "
+                  f"({rate:.1f} docs/s)", file=sys.stderr)
+
+    workers = workers or os.cpu_count() or 1
+    pool = Pool(workers, initializer=_init_worker, initargs=(ner_cache,)) if workers > 1 else None
+    try:
+        if pool is None:
+            _init_worker(ner_cache)
+            results = map(score_item, pending())
+        else:
+            results = pool.imap_unordered(score_item, pending(), chunksize=4)
+        for key, row, err in results:
+            if err:
+                stats["failed"] += 1
+                if not quiet:
+                    print(f"WARN: {key}: {err}", file=sys.stderr)
+                continue
+            batch.append((key, row))
+            stats["scored"] += 1
+            if len(batch) >= batch_size:
+                write_batch(conn, batch)
+                batch = []
+            if progress_every and stats["scored"] % progress_every == 0:
+                report()
+        if batch:
+            write_batch(conn, batch)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        conn.close()
+    report(final=True)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a folder or NDJSON manifest of application packs.")
+    parser.add_argument('source', help="Directory of .pdf/.docx/.txt files, or an NDJSON manifest")
+    parser.add_argument('--db', default='assessments.db', help="Path to the assessments DB")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--batch-size', type=int, default=100, help="Assessments per DB transaction")
+    parser.add_argument('--progress-every', type=int, default=100, help="Print progress every N documents")
+    parser.add_argument('--ner-cache', default=os.environ.get('QIAS_NER_CACHE'),
+                        help="NER cache DB; texts analysed before skip spaCy (default: $QIAS_NER_CACHE)")
+    args = parser.parse_args(argv)
+    run(args.source, db_path=args.db, workers=args.workers, batch_size=args.batch_size,
+        progress_every=args.progress_every, ner_cache=args.ner_cache)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Export stored assessments to NDJSON or CSV without going through HTTP.
+
+Usage:
+    python scripts/export_assessments.py --format csv --since 2025-10-01 --out assessments.csv
+
+Rows are streamed from a single DB cursor, so memory stays flat regardless of
+how many assessments are stored. Writes to stdout when --out is omitted.
+"""
+
+import os
+import sys
+import argparse
+import sqlite3
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import assessment_store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export assessments as NDJSON or CSV.")
+    parser.add_argument('--db', default='assessments.db', help="Path to the assessments DB")
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--since', help="Only rows with created_at >= this ISO date/timestamp")
+    parser.add_argument('--until', help="Only rows with created_at < this ISO date/timestamp")
+    parser.add_argument('--out', help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db)
+    out = open(args.out, 'w', newline='', encoding='utf-8') if args.out else sys.stdout
+    count = 0
+    try:
+        items = assessment_store.iter_export_rows(conn, since=args.since, until=args.until)
+        serializer = assessment_store.export_csv if args.format == 'csv' else assessment_store.export_ndjson
+        for chunk in serializer(items):
+            out.write(chunk)
+            count += 1
+    finally:
+        conn.close()
+        if out is not sys.stdout:
+            out.close()
+    if args.format == 'csv':
+        count -= 1  # header chunk
+    print(f"Exported {max(count, 0)} assessments.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+List the most expensive requests from the per-request accounting log.
+
+Usage:
+    python scripts/request_report.py --log logs/requests.log.jsonl --by memory --top 20
+    python scripts/request_report.py --log logs/requests.log.jsonl --by latency --endpoint /api/scorecard_upload
+
+--by memory ranks by peak traced Python allocation (falling back to RSS growth
+when tracemalloc wasn't enabled); rss, latency and cpu rank by those columns.
+Rotated backups (log.1, log.2, ...) are read too.
+"""
+
+import os
+import sys
+import argparse
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import request_log
+
+SORT_KEYS = {
+    'memory': lambda r: r.get('py_peak_kb') if r.get('py_peak_kb') is not None else (r.get('rss_delta_kb') or 0),
+    'rss': lambda r: r.get('rss_delta_kb') or 0,
+    'latency': lambda r: r.get('wall_ms') or 0,
+    'cpu': lambda r: r.get('cpu_ms') or 0,
+}
+
+COLUMNS = ['ts', 'method', 'path', 'status', 'wall_ms', 'cpu_ms', 'py_peak_kb', 'rss_delta_kb',
+           'input_bytes', 'text_chars', 'in_flight']
+
+
+def worst(records, by: str, top: int, endpoint: str = None):
+    if endpoint:
+        records = (r for r in records if r.get('endpoint') == endpoint or r.get('path') == endpoint)
+    return sorted(records, key=SORT_KEYS[by], reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the worst requests by memory or latency.")
+    parser.add_argument('--log', default=os.environ.get('QIAS_REQUEST_LOG', 'logs/requests.log.jsonl'),
+                        help="Request log path (default: $QIAS_REQUEST_LOG)")
+    parser.add_argument('--by', choices=sorted(SORT_KEYS), default='memory')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--endpoint', help="Only this route or path, e.g. /api/scorecard_upload")
+    args = parser.parse_args(argv)
+
+    if not request_log.log_files(args.log):
+        print(f"No request log at {args.log}", file=sys.stderr)
+        return 1
+    rows = worst(request_log.iter_records(args.log), args.by, args.top, args.endpoint)
+    table = [COLUMNS] + [['' if r.get(c) is None else str(r.get(c)) for c in COLUMNS] for r in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(COLUMNS))]
+    for row in table:
+        print('  '.join(v.ljust(w) for v, w in zip(row, widths)).rstrip())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
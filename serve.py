@@ -0,0 +1,331 @@
+"""
+Production server entry point: preload once, then fork workers.
+
+    python serve.py --workers 4 --port 8000
+
+The master imports the app and calls app.warmup() (spaCy model, rules,
+resources, regulation texts, DB schema), moves everything it allocated into
+the GC's permanent generation with gc.freeze(), binds the listening socket and
+forks the workers. Workers inherit the loaded model as copy-on-write pages:
+with the collector disabled during preload and the heap frozen, the GC never
+writes to those objects, so the pages stay shared instead of being copied into
+every worker.
+
+Signals sent to the master:
+    HUP       reload rules/resources/regulation texts, start a fresh set of
+              workers and stop the old ones gracefully (code changes still
+              need a restart)
+    TERM/INT  stop: workers finish their in-flight requests and exit
+    USR1      print per-worker memory (RSS, PSS, private) from /proc
+
+Each worker exits after --max-requests requests (plus up to --max-requests-jitter,
+so they don't all recycle at once) and the master forks a replacement, which
+bounds the damage from slow leaks. Workers that don't stop within
+--graceful-timeout seconds are killed.
+
+With admission control on (QIAS_ADMISSION, see app.py) the default gate
+concurrency is --threads, and each worker accepts that many more connections
+than --threads as the gates can hold (running plus queued). The gates, not
+the accept loop, then bound the expensive endpoints: excess requests reach the
+app and get a fast 429 instead of waiting unboundedly in the listen backlog,
+and --threads slots stay free for cheap requests.
+
+Workers share nothing at runtime: metrics, admission gates, caches and the
+write-behind writer are per worker. A scrape of /api/metrics is answered by
+whichever worker accepted it and reports that worker's values only, so every
+sample carries a worker="<pid>" label; each series then stays monotonic, and
+sum without (worker) (...) aggregates across workers. A recycled worker's
+series ends and its replacement starts new ones under its own pid.
+
+Every option defaults from a QIAS_* environment variable (see main()).
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from werkzeug.serving import BaseWSGIServer, ThreadedWSGIServer
+
+import metrics
+
+
+def memory_kb(pid: int) -> Optional[Dict[str, int]]:
+    """RSS, PSS and private memory of `pid` in KiB from /proc (None where unavailable)."""
+    fields = {'Rss': 'rss', 'Pss': 'pss', 'Private_Clean': 'private', 'Private_Dirty': 'private'}
+    out = {'rss': 0, 'pss': 0, 'private': 0}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in fields:
+                    out[fields[key]] += int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return out
+
+
+class _SyncServer(BaseWSGIServer):
+    """One request at a time; counts requests for max-requests recycling."""
+
+    handled = 0
+
+    def process_request(self, request, client_address):
+        self.handled += 1
+        super().process_request(request, client_address)
+
+
+class _BoundedThreadedServer(ThreadedWSGIServer):
+    """Thread per request, at most `threads` at a time.
+
+    When every slot is busy the worker stops accepting, so new connections go
+    to a worker that has capacity. Request threads are joined on close, which
+    is what makes shutdown graceful.
+    """
+
+    daemon_threads = False
+    handled = 0
+
+    def __init__(self, *args, threads: int = 4, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._slots = threading.BoundedSemaphore(threads)
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        self.handled += 1
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+
+class Arbiter:
+    """Preloads the app, owns the listening socket and keeps `workers` children running."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 5000, workers: int = 2, threads: int = 4,
+                 max_requests: int = 0, max_requests_jitter: int = 0, graceful_timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.threads = max(1, threads)
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.app_module = None
+        self.sock = None
+        self.generation = 0
+        self.children: Dict[int, int] = {}     # pid -> generation
+        self.stopping: Dict[int, float] = {}   # pid -> kill deadline
+        self._signals = []
+
+    # --- master ---
+
+    def preload(self):
+        started = time.perf_counter()
+        # Keep the collector from touching (and so un-sharing) objects while the
+        # model loads, then freeze the heap so it never scans them afterwards.
+        gc.disable()
+        import app as app_module
+        app_module.warmup()
+        app_module.limit_admission(self.threads)
+        self.app_module = app_module
+        gc.collect()
+        gc.freeze()
+        mem = memory_kb(os.getpid())
+        rss = f", RSS {mem['rss'] // 1024} MiB" if mem else ''
+        print(f"INFO: Preloaded app in {time.perf_counter() - started:.2f}s{rss}.", flush=True)
+
+    def bind(self):
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(128)
+        # Non-blocking: when several workers wake for one connection, the ones
+        # that lose the accept() race go back to polling instead of blocking.
+        sock.setblocking(False)
+        self.sock = sock
+        self.port = sock.getsockname()[1]
+
+    def run(self) -> int:
+        self.preload()
+        self.bind()
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+            signal.signal(sig, lambda signum, frame: self._signals.append(signum))
+        print(f"INFO: Listening on http://{self.host}:{self.port} "
+              f"({self.workers} workers x {self.threads} threads, pid {os.getpid()}).", flush=True)
+        self.generation = 1
+        self.spawn_missing()
+        try:
+            while True:
+                while self._signals:
+                    signum = self._signals.pop(0)
+                    if signum == signal.SIGHUP:
+                        self.reload()
+                    elif signum == signal.SIGUSR1:
+                        self.print_memory()
+                    else:
+                        return self.shutdown()
+                self.reap()
+                self.spawn_missing()
+                self.kill_stragglers()
+                time.sleep(0.1)
+        finally:
+            self.sock.close()
+
+    def spawn_missing(self):
+        current = sum(1 for gen in self.children.values() if gen == self.generation)
+        for _ in range(self.workers - current):
+            self.spawn()
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = self.worker_main()
+            except BaseException as e:
+                print(f"ERROR: Worker {os.getpid()} crashed: {e}", flush=True)
+            finally:
+                os._exit(code)
+        self.children[pid] = self.generation
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            gen = self.children.pop(pid, None)
+            self.stopping.pop(pid, None)
+            if gen == self.generation and os.waitstatus_to_exitcode(status) != 0:
+                print(f"WARN: Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; replacing it.",
+                      flush=True)
+
+    def stop_workers(self, pids):
+        deadline = time.monotonic() + self.graceful_timeout
+        for pid in pids:
+            if pid not in self.stopping:
+                self.stopping[pid] = deadline
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+    def kill_stragglers(self):
+        now = time.monotonic()
+        for pid, deadline in list(self.stopping.items()):
+            if now >= deadline:
+                print(f"WARN: Worker {pid} did not stop within {self.graceful_timeout}s; killing it.", flush=True)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                self.stopping[pid] = float('inf')
+
+    def reload(self):
+        """Re-read the data files in the master, then replace every worker."""
+        app_module = self.app_module
+        app_module.load_rules()
+        app_module.load_resources()
+        app_module.load_regulation_texts()
+        gc.collect()
+        gc.freeze()
+        old = list(self.children)
+        self.generation += 1
+        self.spawn_missing()
+        self.stop_workers(old)
+        print(f"INFO: Reloaded; generation {self.generation} started, stopping {len(old)} old workers.", flush=True)
+
+    def shutdown(self) -> int:
+        print("INFO: Shutting down; waiting for in-flight requests.", flush=True)
+        self.stop_workers(list(self.children))
+        while self.children:
+            self.reap()
+            self.kill_stragglers()
+            time.sleep(0.05)
+        return 0
+
+    def print_memory(self):
+        for pid in [os.getpid()] + sorted(self.children):
+            mem = memory_kb(pid)
+            role = 'master' if pid == os.getpid() else f'worker g{self.children[pid]}'
+            if mem is None:
+                print(f"INFO: {role} {pid}: memory unavailable", flush=True)
+            else:
+                print(f"INFO: {role} {pid}: rss {mem['rss'] // 1024} MiB, pss {mem['pss'] // 1024} MiB, "
+                      f"private {mem['private'] // 1024} MiB", flush=True)
+
+    # --- worker ---
+
+    def worker_main(self) -> int:
+        stop = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda signum, frame: stop.set())
+        for sig in (signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(sig, signal.SIG_IGN)
+        gc.enable()
+        random.seed()
+        metrics.set_constant_labels(worker=os.getpid())
+        if getattr(self.app_module, 'REQUEST_LOG', None) is not None:
+            self.app_module.REQUEST_LOG.open_for_worker(os.getpid())
+        limit = 0
+        if self.max_requests > 0:
+            limit = self.max_requests + random.randint(0, max(0, self.max_requests_jitter))
+        fd = self.sock.fileno()
+        slots = self.threads + self.app_module.admission_capacity()
+        if slots > 1:
+            server = _BoundedThreadedServer(self.host, self.port, self.app_module.app, fd=fd, threads=slots)
+        else:
+            server = _SyncServer(self.host, self.port, self.app_module.app, fd=fd)
+        server.socket.setblocking(False)
+        server.timeout = 0.5
+        try:
+            while not stop.is_set() and not (limit and server.handled >= limit):
+                server.handle_request()
+        finally:
+            server.server_close()  # joins in-flight request threads
+            self.app_module.shutdown_writer()
+        if limit and server.handled >= limit:
+            print(f"INFO: Worker {os.getpid()} recycling after {server.handled} requests.", flush=True)
+        return 0
+
+
+def main(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Preload the app once and serve it from forked workers.")
+    parser.add_argument('--host', default=env('QIAS_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(env('QIAS_PORT', '5000')))
+    parser.add_argument('--workers', type=int, default=int(env('QIAS_WORKERS', '0')) or os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--threads', type=int, default=int(env('QIAS_THREADS', '4')),
+                        help="Concurrent requests per worker (1 = one at a time)")
+    parser.add_argument('--max-requests', type=int, default=int(env('QIAS_MAX_REQUESTS', '0')),
+                        help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument('--max-requests-jitter', type=int, default=int(env('QIAS_MAX_REQUESTS_JITTER', '0')),
+                        help="Add up to this many requests to each worker's limit")
+    parser.add_argument('--graceful-timeout', type=float, default=float(env('QIAS_GRACEFUL_TIMEOUT', '30')),
+                        help="Seconds a stopping worker may take before it is killed")
+    args = parser.parse_args(argv)
+    arbiter = Arbiter(args.host, args.port, args.workers, args.threads, args.max_requests,
+                      args.max_requests_jitter, args.graceful_timeout)
+    return arbiter.run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Single-flight coalescing of identical concurrent computations.
+
+While a computation for a key is running, further callers with the same key
+wait for it and receive the same result (or exception) instead of starting
+their own. Nothing is cached once the computation finishes.
+"""
+
+import threading
+from typing import Any, Callable, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run `fn` once per concurrent `key`; returns (value, shared).
+
+        `shared` is True when the value came from another caller's computation.
+        The value is handed to every waiter as-is, so treat it as read-only.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls)
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": in_flight}
@@ -370,18 +370,19 @@
         const payloadText = docsInput && docsInput.value ? docsInput.value : '';
         // Prefer using the last assessment id (for file uploads or text runs)
         const body = {};
-        if (window.__lastAssessmentId) {
-          body.assessment_id = window.__lastAssessmentId;
-        } else if (payloadText) {
+        if (payloadText) {
           body.documents = payloadText;
         } else if (window.__lastResult) {
           body.result = window.__lastResult;
         }
-        const resp = await fetch('/api/report', {
-          method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify(body)
-        });
+        // Stored assessments have a cacheable GET (the browser revalidates via ETag)
+        const resp = window.__lastAssessmentId
+          ? await fetch('/api/report/' + encodeURIComponent(window.__lastAssessmentId))
+          : await fetch('/api/report', {
+              method: 'POST',
+              headers: { 'Content-Type': 'application/json' },
+              body: JSON.stringify(body)
+            });
         if (!resp.ok) throw new Error('Server returned ' + resp.status);
         const blob = await resp.blob();
         const url = URL.createObjectURL(blob);
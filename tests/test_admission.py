@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import app
+from admission import AdmissionGate, Rejected, parse_limits
+
+
+def test_gate_queues_then_rejects_when_full():
+    gate = AdmissionGate('x', concurrency=1, queue_size=1, max_wait=5)
+    gate.acquire()
+    admitted = threading.Event()
+
+    def waiter():
+        gate.acquire()
+        admitted.set()
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    while gate.waiting < 1:
+        time.sleep(0.001)
+    with pytest.raises(Rejected) as e:
+        gate.acquire()
+    assert e.value.reason == 'queue_full' and e.value.retry_after >= 1
+    gate.release(0.1)
+    t.join(5)
+    assert admitted.is_set()
+    assert gate.stats()['active'] == 1 and gate.stats()['rejected']['queue_full'] == 1
+
+
+def test_gate_rejects_after_max_wait():
+    gate = AdmissionGate('x', concurrency=1, queue_size=4, max_wait=0.05)
+    gate.acquire()
+    with pytest.raises(Rejected) as e:
+        gate.acquire()
+    assert e.value.reason == 'timeout'
+    assert gate.waiting == 0
+
+
+def test_fair_gate_round_robins_between_clients():
+    gate = AdmissionGate('x', concurrency=1, queue_size=10, max_wait=5, fair=True)
+    gate.acquire('setup')
+    order = []
+    threads = []
+    for client in ['a', 'a', 'a', 'b']:
+        t = threading.Thread(target=lambda c=client: (gate.acquire(c), order.append(c), gate.release()))
+        t.start()
+        threads.append(t)
+        while gate.waiting < len(threads):
+            time.sleep(0.001)
+    gate.release()
+    for t in threads:
+        t.join(5)
+    # 'b' arrived last but is served second, not behind all of 'a'
+    assert order == ['a', 'b', 'a', 'a']
+
+
+def test_parse_limits():
+    assert parse_limits('/api/scorecard=4:16, /api/report=2', 8, 32) == {
+        '/api/scorecard': (4, 16), '/api/report': (2, 8)}
+
+
+def test_busy_endpoint_returns_429_with_retry_after(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'DB_PATH', str(tmp_path / 'assessments.db'))
+    monkeypatch.setattr(app, 'ADMISSION', app.configure_admission('/api/scorecard=1:0'))
+    client = app.app.test_client()
+    gate = app.ADMISSION['/api/scorecard']
+
+    gate.acquire()  # another request holds the only slot
+    r = client.post('/api/scorecard', json={'documents': 'Paid-Up Capital: QAR 1,000,000'})
+    assert r.status_code == 429
+    assert int(r.headers['Retry-After']) >= 1
+    gate.release()
+
+    assert client.post('/api/scorecard', json={'documents': 'Paid-Up Capital: QAR 1,000,000'}).status_code == 200
+    stats = client.get('/api/status').get_json()['admission']['/api/scorecard']
+    assert stats['admitted'] == 2 and stats['rejected']['queue_full'] == 1 and stats['active'] == 0
+    assert 'qias_admission_rejected_total{endpoint="/api/scorecard",reason="queue_full"} 1' in \
+        client.get('/api/metrics').get_data(as_text=True)
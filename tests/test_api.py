@@ -0,0 +1,211 @@
+import os
+import sys
+import gzip
+import io
+import json
+import zipfile
+
+import pytest
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'DB_PATH', str(tmp_path / 'assessments.db'))
+    monkeypatch.setattr(app, 'ASSESSMENT_CACHE', app.assessment_store.BlobLRU(16))
+    monkeypatch.setattr(app, 'REPORT_CACHE', app.report_cache.ReportCache(str(tmp_path / 'reports'), 10 * 1024 * 1024))
+    app.init_db()
+    return app.app.test_client()
+
+
+def test_get_assessment_serves_stored_gzip_body(client):
+    created = client.post('/api/scorecard', json={'documents': 'Paid-Up Capital: QAR 1,000,000'}).get_json()
+    aid = created['assessment_id']
+
+    r = client.get(f'/api/assessments/{aid}', headers={'Accept-Encoding': 'gzip'})
+    assert r.status_code == 200
+    assert r.headers['Content-Encoding'] == 'gzip'
+    body = json.loads(gzip.decompress(r.data))
+    assert body['id'] == aid
+    assert body['failed_gaps'] == created['failed_gaps']
+    assert body['score_breakdown'] == created['score_breakdown']
+
+    plain = client.get(f'/api/assessments/{aid}', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_json() == body
+    assert app.ASSESSMENT_CACHE.hits >= 1
+    assert client.get('/api/assessments/999999').status_code == 404
+
+
+def test_stored_report_is_cached_and_revalidated(client, monkeypatch):
+    aid = client.post('/api/scorecard', json={'documents': 'Paid-Up Capital: QAR 1,000,000'}).get_json()['assessment_id']
+
+    first = client.get(f'/api/report/{aid}')
+    assert first.status_code == 200
+    assert first.data.startswith(b'%PDF')
+    etag = first.headers['ETag']
+
+    # Repeat downloads come from the cache without re-rendering
+    monkeypatch.setattr(app, 'build_pdf_from_result', lambda result: pytest.fail('re-rendered'))
+    again = client.post('/api/report', json={'assessment_id': aid})
+    assert again.data == first.data
+    assert app.REPORT_CACHE.hits == 1
+    assert client.get(f'/api/report/{aid}', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/report/999999').status_code == 404
+
+
+def test_batch_reports_stream_a_zip(client, monkeypatch):
+    monkeypatch.setattr(app, 'BATCH_REPORT_WORKERS', 2)
+    ids = [client.post('/api/scorecard', json={'documents': f'Paid-Up Capital: QAR {n},000,000'}).get_json()['assessment_id']
+           for n in (1, 9)]
+    r = client.post('/api/reports/batch', json={'assessment_ids': ids + [ids[0], 999999]})
+    assert r.status_code == 200
+    assert r.is_streamed
+    with zipfile.ZipFile(io.BytesIO(r.data)) as zf:
+        names = zf.namelist()
+        assert sorted(names) == sorted([f'report_{i}.pdf' for i in ids] + ['errors.txt'])
+        assert zf.read(f'report_{ids[0]}.pdf').startswith(b'%PDF')
+        assert 'report_999999.pdf' in zf.read('errors.txt').decode()
+    # Rendered reports are cached for single downloads
+    assert len(os.listdir(app.REPORT_CACHE.directory)) == 2
+    pool = app.report_batch.shared_pool()
+    assert pool._mp_context.get_start_method() != 'fork'  # never fork the threaded server
+
+    by_filter = client.post('/api/reports/batch', json={'filter': {'min_score': 0}})
+    with zipfile.ZipFile(io.BytesIO(by_filter.data)) as zf:
+        assert sorted(zf.namelist()) == sorted(f'report_{i}.pdf' for i in ids)
+    # Both requests rendered in the same long-lived pool
+    assert app.report_batch.shared_pool() is pool
+    app.report_batch.shutdown_pool()
+    assert client.post('/api/reports/batch', json={}).status_code == 400
+
+
+
+def test_concurrent_first_use_starts_one_writer(client, monkeypatch):
+    import threading
+    import time
+    started = []
+
+    class SlowWriter:
+        def __init__(self, *args, **kwargs):
+            time.sleep(0.05)  # widen the window between the check and the assignment
+            started.append(self)
+
+    monkeypatch.setattr(app, 'WRITE_BEHIND', True)
+    monkeypatch.setattr(app, '_writer', None)
+    monkeypatch.setattr(app.assessment_store, 'WriteBehindWriter', SlowWriter)
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(app.get_writer())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(started) == 1 and all(w is started[0] for w in got)
+
+
+def test_pipeline_reuses_stages_and_reports_server_timing(client, monkeypatch):
+    pipeline = app.Pipeline(text='Paid-Up Capital: QAR 1,000,000')
+    result = pipeline.result()
+    calls = []
+    monkeypatch.setattr(app, 'run_extraction', lambda text: calls.append(text) or {})
+    assert pipeline.render().startswith(b'%PDF')
+    assert calls == []  # render reused the scorecard
+    assert pipeline.result() == result
+    assert {'extract', 'gaps', 'score', 'recommend', 'render'} <= set(pipeline.timings)
+
+    r = client.post('/api/scorecard?timing=1', json={'documents': 'Paid-Up Capital: QAR 1,000,000'})
+    stages = [part.split(';')[0] for part in r.headers['Server-Timing'].split(', ')]
+    assert stages[:1] == ['extract'] and 'persist' in stages
+    assert 'Server-Timing' not in client.post('/api/scorecard', json={'documents': 'x'}).headers
+
+
+def test_metrics_expose_requests_stages_and_swallowed_db_errors(client, monkeypatch, tmp_path):
+    client.post('/api/scorecard', json={'documents': 'Paid-Up Capital: QAR 1,000,000'})
+    monkeypatch.setattr(app, 'DB_PATH', str(tmp_path / 'missing' / 'assessments.db'))
+    failed = client.post('/api/scorecard', json={'documents': 'Paid-Up Capital: QAR 2,000,000'})
+    assert failed.status_code == 200 and 'assessment_id' not in failed.get_json()
+
+    text = client.get('/api/metrics').get_data(as_text=True)
+    assert 'qias_http_requests_total{method="POST",endpoint="/api/scorecard",status="200"}' in text
+    assert 'qias_http_request_seconds_bucket{method="POST",endpoint="/api/scorecard",le="+Inf"}' in text
+    for stage in ('extract', 'score', 'persist', 'db_write'):
+        assert f'qias_stage_seconds_count{{stage="{stage}"}}' in text
+    assert 'qias_db_errors_total{op="insert"}' in text
+    assert 'qias_cache_lookups_total{cache="assessment",result="miss"}' in text
+
+
+
+def test_bad_query_parameters_are_rejected_not_counted_as_db_errors(client):
+    before = dict(app.metrics.DB_ERRORS._snapshot())
+    for url in ('/api/analytics?since=garbage', '/api/analytics?until=2025-13-01',
+                '/api/analytics?granularity=month', '/api/assessments?since=garbage',
+                '/api/assessments/export?until=yesterday'):
+        assert client.get(url).status_code == 400, url
+    assert client.get('/api/analytics?since=2025-10-01&until=2025-11-01T00:00:00').status_code == 200
+    assert dict(app.metrics.DB_ERRORS._snapshot()) == before
+
+
+def test_profiling_is_opt_in_per_request(client, monkeypatch, tmp_path):
+    profiler = app.request_profiler.RequestProfiler(str(tmp_path / 'profiles'), token='secret')
+    monkeypatch.setattr(app, 'PROFILER', profiler)
+
+    plain = client.post('/api/scorecard', json={'documents': 'Paid-Up Capital: QAR 1,000,000'})
+    assert 'X-Profile' not in plain.headers
+    wrong = client.post('/api/scorecard', json={'documents': 'x'}, headers={'X-Profile-Token': 'nope'})
+    assert 'X-Profile' not in wrong.headers
+    non_ascii = client.post('/api/scorecard', json={'documents': 'x'}, headers={'X-Profile-Token': 'secr\u00e9t'})
+    assert non_ascii.status_code == 200 and 'X-Profile' not in non_ascii.headers
+
+    r = client.post('/api/scorecard', json={'documents': 'Paid-Up Capital: QAR 1,000,000'},
+                    headers={'X-Profile-Token': 'secret'})
+    name = r.headers['X-Profile']
+    assert r.headers['X-Profile-Top']
+    saved = os.listdir(tmp_path / 'profiles')
+    assert sorted(saved) == [name + '.pstats', name + '.txt']
+    import pstats
+    assert pstats.Stats(str(tmp_path / 'profiles' / (name + '.pstats'))).total_calls > 0
+
+    # A request overlapping another profile is served, just not profiled
+    other = profiler.start()
+    try:
+        busy = client.post('/api/scorecard', json={'documents': 'x'}, headers={'X-Profile-Token': 'secret'})
+    finally:
+        profiler.cancel(other)
+    assert busy.status_code == 200 and 'X-Profile' not in busy.headers
+    assert profiler.skipped == 1
+
+
+def test_read_endpoints_revalidate_and_compress(client):
+    texts = client.get('/api/regulation_texts', headers={'Accept-Encoding': 'gzip'})
+    assert texts.status_code == 200
+    assert texts.headers['Cache-Control'] == 'public, max-age=300'
+    assert texts.headers['Last-Modified']
+    assert json.loads(gzip.decompress(texts.data)) == app.REGULATION_TEXTS
+    again = client.get('/api/regulation_texts', headers={'If-None-Match': texts.headers['ETag']})
+    assert again.status_code == 304 and again.data == b''
+
+    aid = client.post('/api/scorecard', json={'documents': 'Paid-Up Capital: QAR 1,000,000'}).get_json()['assessment_id']
+    first = client.get(f'/api/assessments/{aid}')
+    assert 'immutable' in first.headers['Cache-Control']
+    assert client.get(f'/api/assessments/{aid}', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get('/api/assessments/999999', headers={'If-None-Match': 'W/"a999999"'}).status_code == 404
+    missing = client.get('/api/assessments/999999')
+    assert missing.status_code == 404 and missing.headers['Cache-Control'] == 'no-store'
+
+    for _ in range(15):
+        client.post('/api/scorecard', json={'documents': 'Paid-Up Capital: QAR 1,000,000'})
+    listing = client.get('/api/assessments?limit=50&fields=id,created_at,failed_gaps,readiness_score',
+                         headers={'Accept-Encoding': 'gzip'})
+    assert listing.headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(listing.data))) == 16
+    assert client.get('/api/assessments?limit=50&fields=id,created_at,failed_gaps,readiness_score',
+                      headers={'If-None-Match': listing.headers['ETag']}).status_code == 304
+
+    analytics = client.get('/api/analytics')
+    assert client.get('/api/analytics', headers={'If-None-Match': analytics.headers['ETag']}).status_code == 304
+    client.post('/api/scorecard', json={'documents': 'x'})
+    assert client.get('/api/analytics', headers={'If-None-Match': analytics.headers['ETag']}).status_code == 200
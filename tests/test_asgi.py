@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import app
+import asgi
+
+
+@pytest.fixture
+def adapter(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'DB_PATH', str(tmp_path / 'assessments.db'))
+    monkeypatch.setattr(app, 'ASSESSMENT_CACHE', app.assessment_store.BlobLRU(16))
+    monkeypatch.setattr(app, 'REPORT_CACHE', None)
+    app.init_db()
+    adapter = asgi.ExecutorAdapter(app.app, {'analyse': 1, 'render': 1, 'light': 2})
+    yield adapter
+    adapter.close()
+
+
+async def _request(adapter, method, path, body=b'', headers=()):
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'http_version': '1.1',
+             'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 5555),
+             'headers': [(k.encode(), v.encode()) for k, v in headers]}
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await adapter(scope, receive, send)
+    status = sent[0]['status']
+    headers = {k.decode(): v.decode() for k, v in sent[0]['headers']}
+    return status, headers, b''.join(m.get('body', b'') for m in sent[1:])
+
+
+def test_adapter_serves_json_and_routes_to_pools(adapter):
+    status, headers, body = asyncio.run(_request(adapter, 'POST', '/api/scorecard',
+                                                 json.dumps({'documents': 'Paid-Up Capital: QAR 1,000,000'}).encode(),
+                                                 [('content-type', 'application/json')]))
+    assert status == 200
+    assert headers['content-type'] == 'application/json'
+    assert json.loads(body)['assessment_id']
+    assert adapter.stats()['analyse']['completed'] == 1
+    assert asgi.classify('/api/reports/batch') == 'render'
+    assert asgi.classify('/api/regulation_texts') == 'light'
+
+
+def test_cheap_endpoints_stay_responsive_while_analysis_is_queued(adapter, monkeypatch):
+    release = threading.Event()
+    real = app.run_extraction
+
+    def slow_extraction(text):
+        release.wait(5)
+        return real(text)
+
+    monkeypatch.setattr(app, 'run_extraction', slow_extraction)
+
+    async def scenario():
+        body = json.dumps({'documents': 'slow doc'}).encode()
+        heavy = [asyncio.create_task(_request(adapter, 'POST', '/api/scorecard', body + b' ' * i,
+                                              [('content-type', 'application/json')])) for i in range(3)]
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        status, _, _ = await _request(adapter, 'GET', '/api/status')
+        elapsed = time.perf_counter() - started
+        stats = adapter.stats()['analyse']
+        release.set()
+        results = await asyncio.gather(*heavy)
+        return status, elapsed, stats, [r[0] for r in results]
+
+    status, elapsed, stats, heavy_statuses = asyncio.run(scenario())
+    assert status == 200 and elapsed < 1.0
+    assert stats['active'] == 1 and stats['queued'] == 2
+    assert heavy_statuses == [200, 200, 200]
+
+
+def test_oversized_body_is_rejected(adapter):
+    adapter.max_body = 10
+    status, _, _ = asyncio.run(_request(adapter, 'POST', '/api/scorecard', b'x' * 11))
+    assert status == 413
+
+
+def test_admission_rejects_before_requests_queue_on_the_pool(adapter, monkeypatch):
+    monkeypatch.setattr(app, 'ADMISSION', app.configure_admission('/api/scorecard=1:0'))
+    adapter.admit = app.admission_for
+    release = threading.Event()
+    real = app.run_extraction
+
+    def slow_extraction(text):
+        release.wait(5)
+        return real(text)
+
+    monkeypatch.setattr(app, 'run_extraction', slow_extraction)
+
+    async def scenario():
+        body = json.dumps({'documents': 'slow doc'}).encode()
+        heavy = [asyncio.create_task(_request(adapter, 'POST', '/api/scorecard', body + b' ' * i,
+                                              [('content-type', 'application/json')])) for i in range(4)]
+        await asyncio.sleep(0.2)
+        stats = adapter.stats()['analyse']
+        release.set()
+        return stats, await asyncio.gather(*heavy)
+
+    stats, results = asyncio.run(scenario())
+    assert stats['queued'] == 0
+    assert sorted(r[0] for r in results) == [200, 429, 429, 429]
+    assert all(int(r[1]['retry-after']) >= 1 for r in results if r[0] == 429)
+    gate = app.ADMISSION['/api/scorecard']
+    assert gate.stats()['active'] == 0 and gate.stats()['rejected']['queue_full'] == 3
+
+
+
+def test_admission_is_decided_before_the_body_is_read(adapter, monkeypatch):
+    monkeypatch.setattr(app, 'ADMISSION', app.configure_admission('/api/scorecard=1:0'))
+    adapter.admit = app.admission_for
+    gate = app.ADMISSION['/api/scorecard']
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/scorecard', 'query_string': b'', 'headers': []}
+    received, sent = [], []
+
+    async def receive():
+        received.append(1)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    gate.acquire()
+    asyncio.run(adapter(scope, receive, send))
+    assert sent[0]['status'] == 429 and received == []  # rejected without buffering the upload
+    gate.release()
+
+    sent.clear()
+    asyncio.run(adapter(scope, receive, send))
+    assert sent == [] and received == [1]
+    assert gate.stats()['active'] == 0  # the slot taken before the failed read is given back
+
+
+def test_client_disconnect_mid_body_is_not_dispatched(adapter):
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/scorecard', 'query_string': b'', 'headers': []}
+    messages = [{'type': 'http.request', 'body': b'{"documents": "trunc', 'more_body': True},
+                {'type': 'http.disconnect'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(adapter(scope, receive, send))
+    assert sent == [] and adapter.stats()['analyse']['completed'] == 0
+
+
+def test_cancelled_request_does_not_strand_the_pool_thread(monkeypatch):
+    monkeypatch.setattr(asgi, '_PUT_POLL_S', 0.05)
+
+    def streaming_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return (b'x' * 1024 for _ in range(100))
+
+    adapter = asgi.ExecutorAdapter(streaming_app, {'light': 1})
+    scope = {'type': 'http', 'method': 'GET', 'path': '/stream', 'query_string': b'', 'headers': []}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        await asyncio.Event().wait()  # a client that never reads
+
+    async def scenario():
+        task = asyncio.create_task(adapter(scope, receive, send))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        for _ in range(100):
+            if adapter.stats()['light']['active'] == 0:
+                break
+            await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert adapter.stats()['light']['active'] == 0
+    adapter.close()
@@ -0,0 +1,266 @@
+import os
+import sys
+import sqlite3
+import csv
+import io
+import json
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import assessment_store
+
+
+SAMPLE_RESULT = {
+    'extracted_data': {'paid_up_capital': 5000000},
+    'readiness_score': 40,
+    'failed_gaps': ['Capital Shortfall'],
+    'score_breakdown': [{'check': 'Capital Shortfall', 'status': 'FAIL', 'weight': 15.0, 'score_contribution': 0}],
+}
+
+
+def _new_db(tmp_path):
+    path = str(tmp_path / 'assessments.db')
+    conn = sqlite3.connect(path)
+    assessment_store.init_schema(conn)
+    conn.close()
+    return path
+
+
+def test_reserve_ids_continues_after_existing_rows(tmp_path):
+    path = _new_db(tmp_path)
+    conn = sqlite3.connect(path)
+    first = assessment_store.insert_rows(conn, [assessment_store.build_row(SAMPLE_RESULT)])
+    ids = assessment_store.reserve_ids(conn, 5)
+    assert list(ids) == list(range(first + 1, first + 6))
+    # AUTOINCREMENT must not reuse a reserved id
+    nxt = assessment_store.insert_rows(conn, [assessment_store.build_row(SAMPLE_RESULT)])
+    assert nxt == first + 6
+    conn.close()
+
+
+def test_write_behind_returns_ids_and_flushes_in_batches(tmp_path):
+    path = _new_db(tmp_path)
+    writer = assessment_store.WriteBehindWriter(path, batch_size=10, flush_interval=0.5)
+    ids = [writer.submit(SAMPLE_RESULT) for _ in range(25)]
+    assert ids == list(range(1, 26))
+    assert writer.pending(ids[-1]) is not None or writer.depth() == 0
+    writer.close()
+
+    assert writer.stats()['queue_depth'] == 0
+    assert writer.written == 25
+    assert writer.batches <= 5
+    assert writer.pending(ids[-1]) is None
+    conn = sqlite3.connect(path)
+    stored = [r[0] for r in conn.execute("SELECT id FROM assessments ORDER BY id")]
+    conn.close()
+    assert stored == ids
+
+
+def test_migration_backfills_legacy_rows(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE assessments (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT NOT NULL, input_len INTEGER, "
+        "readiness_score INTEGER, failed_gaps TEXT, extracted_data TEXT, score_breakdown TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO assessments (created_at, input_len, readiness_score, failed_gaps, extracted_data, score_breakdown) "
+        "VALUES ('2025-10-01T10:00:00', 10, 40, '[\"Data Residency Failure\"]', "
+        "'{\"paid_up_capital\": 5000000, \"has_compliance_officer\": true, \"data_storage_location\": [\"Ireland\"]}', '[]')"
+    )
+    conn.commit()
+
+    assessment_store.init_schema(conn)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == assessment_store.SCHEMA_VERSION
+    row = conn.execute("SELECT paid_up_capital, has_compliance_officer FROM assessments").fetchone()
+    assert row == (5000000, 1)
+    assert conn.execute("SELECT location FROM assessment_locations").fetchall() == [('Ireland',)]
+    assert assessment_store.count_gap_failures(conn, 'Data Residency Failure', '2025-10-01', '2025-11-01') == 1
+    assert assessment_store.count_gap_failures(conn, 'Data Residency Failure', '2025-11-01') == 0
+
+    # Re-running is a no-op
+    assessment_store.init_schema(conn)
+    assert conn.execute("SELECT COUNT(*) FROM assessment_locations").fetchone()[0] == 1
+    conn.close()
+
+
+def _result(score, gaps, locations):
+    return {
+        'extracted_data': {'data_storage_location': locations},
+        'readiness_score': score,
+        'failed_gaps': gaps,
+        'score_breakdown': [],
+    }
+
+
+def test_list_assessments_keyset_pages_and_filters(tmp_path):
+    path = _new_db(tmp_path)
+    conn = sqlite3.connect(path)
+    rows = []
+    for i in range(1, 31):
+        gaps = ['Capital Shortfall'] if i % 3 == 0 else []
+        locs = ['Qatar'] if i % 2 == 0 else ['Ireland']
+        rows.append(assessment_store.build_row(_result(i, gaps, locs), created_at=f"2025-10-{i:02d}T00:00:00"))
+    assessment_store.insert_rows(conn, rows)
+
+    seen, before = [], None
+    while True:
+        items, before = assessment_store.list_assessments(conn, limit=7, before_id=before)
+        seen.extend(i['id'] for i in items)
+        if before is None:
+            break
+    assert seen == list(range(30, 0, -1))
+
+    items, _ = assessment_store.list_assessments(conn, limit=50, gap='Capital Shortfall', jurisdiction='Qatar',
+                                                 fields=['id', 'failed_gaps'])
+    assert [i['id'] for i in items] == [30, 24, 18, 12, 6]
+    assert items[0]['failed_gaps'] == ['Capital Shortfall']
+
+    items, _ = assessment_store.list_assessments(conn, limit=50, since='2025-10-10', until='2025-10-20',
+                                                 min_score=12, max_score=15)
+    assert [i['id'] for i in items] == [15, 14, 13, 12]
+
+    # Ids don't follow created_at (reserved id blocks, several writers): date filters still see every row
+    assessment_store.insert_rows(conn, [
+        assessment_store.build_row(_result(50, [], []), aid=40, created_at='2025-10-12T12:00:00'),
+        assessment_store.build_row(_result(50, [], []), aid=35, created_at='2025-10-31T00:00:00'),
+    ])
+    items, _ = assessment_store.list_assessments(conn, limit=50, since='2025-10-12', until='2025-10-14')
+    assert [i['id'] for i in items] == [40, 13, 12]
+    items, _ = assessment_store.list_assessments(conn, limit=50, since='2025-10-30')
+    assert [i['id'] for i in items] == [35, 30]
+    conn.close()
+
+
+def test_rollups_track_inserts_per_day_and_week(tmp_path):
+    path = _new_db(tmp_path)
+    conn = sqlite3.connect(path)
+    # 2025-10-20 is a Monday; 10-21 is in the same week, 10-27 starts the next
+    assessment_store.insert_rows(conn, [
+        assessment_store.build_row(_result(40, ['Capital Shortfall'], []), created_at='2025-10-20T09:00:00'),
+        assessment_store.build_row(_result(100, [], []), created_at='2025-10-21T09:00:00'),
+    ])
+    assessment_store.insert_rows(conn, [
+        assessment_store.build_row(_result(55, ['Capital Shortfall'], []), created_at='2025-10-27T09:00:00'),
+    ])
+
+    weeks = assessment_store.read_rollups(conn, 'week', checks=['Capital Shortfall', 'AoA Submission'])
+    assert [w['bucket'] for w in weeks] == ['2025-10-20', '2025-10-27']
+    assert weeks[0]['assessments'] == 2
+    assert weeks[0]['average_score'] == 70
+    assert weeks[0]['pass_rate'] == {'Capital Shortfall': 0.5, 'AoA Submission': 1.0}
+    assert weeks[0]['score_distribution']['40-49'] == 1
+    assert weeks[0]['score_distribution']['100'] == 1
+
+    days = assessment_store.read_rollups(conn, 'day', since='2025-10-21', until='2025-10-27')
+    assert [d['bucket'] for d in days] == ['2025-10-21']
+
+    # A row committed with a lower id than one already stored still changes the version
+    version = assessment_store.data_version(conn)
+    assessment_store.insert_rows(conn, [assessment_store.build_row(_result(10, [], []), aid=100)])
+    version_after_high = assessment_store.data_version(conn)
+    assessment_store.insert_rows(conn, [assessment_store.build_row(_result(10, [], []), aid=50)])
+    assert version < version_after_high < assessment_store.data_version(conn)
+    conn.close()
+
+
+def test_export_streams_ndjson_and_csv(tmp_path):
+    path = _new_db(tmp_path)
+    conn = sqlite3.connect(path)
+    assessment_store.insert_rows(conn, [
+        assessment_store.build_row(_result(40, ['Capital Shortfall'], ['Ireland', 'Singapore']), created_at='2025-10-01T00:00:00'),
+        assessment_store.build_row(_result(90, [], ['Qatar']), created_at='2025-10-05T00:00:00'),
+    ])
+
+    lines = list(assessment_store.export_ndjson(assessment_store.iter_export_rows(conn, batch_size=1)))
+    assert len(lines) == 2
+    assert json.loads(lines[0])['failed_gaps'] == ['Capital Shortfall']
+
+    chunks = list(assessment_store.export_csv(assessment_store.iter_export_rows(conn, since='2025-10-02')))
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert rows[0] == assessment_store.CSV_COLUMNS
+    assert len(rows) == 2
+    assert rows[1][rows[0].index('data_storage_location')] == 'Qatar'
+    conn.close()
+
+
+def test_writes_succeed_while_an_export_is_streaming(tmp_path):
+    path = _new_db(tmp_path)
+    conn = sqlite3.connect(path)
+    assessment_store.insert_rows(conn, [assessment_store.build_row(_result(i, [], []), created_at=f'2025-10-{i:02d}T00:00:00')
+                                        for i in range(1, 6)])
+    export = assessment_store.iter_export_rows(conn, batch_size=2)
+    assert next(export)['readiness_score'] == 1  # download in progress, paused on a slow client
+
+    writer = sqlite3.connect(path, timeout=0.2)
+    assessment_store.insert_rows(writer, [assessment_store.build_row(_result(77, [], []), created_at='2025-10-09T00:00:00')])
+    writer.close()
+    assert [item['readiness_score'] for item in export] == [2, 3, 4, 5, 77]
+    conn.close()
+
+
+BREAKDOWN = [
+    {'check': 'Capital Shortfall', 'status': 'FAIL', 'weight': 15.0, 'score_contribution': 0},
+    {'check': 'Data Residency Failure', 'status': 'PASS', 'weight': 7.5, 'score_contribution': 7.5},
+    {'check': 'AoA Submission', 'status': 'PASS', 'weight': 15.0, 'score_contribution': 15.0},
+]
+
+
+def test_compact_rows_round_trip_and_bitmask_filter(tmp_path):
+    path = _new_db(tmp_path)
+    conn = sqlite3.connect(path)
+    failing = dict(SAMPLE_RESULT, score_breakdown=BREAKDOWN, failed_gaps=['Capital Shortfall', 'Custom Gap'])
+    passing = dict(SAMPLE_RESULT, score_breakdown=[dict(b, status='PASS', score_contribution=b['weight']) for b in BREAKDOWN],
+                   failed_gaps=[])
+    text = "Paid-Up Capital: QAR 5,000,000"
+    aid = assessment_store.insert_rows(conn, [assessment_store.build_row(failing, text=text)])
+    assessment_store.insert_rows(conn, [assessment_store.build_row(passing)])
+
+    loaded = assessment_store.load_assessment(conn, aid)
+    assert loaded['failed_gaps'] == ['Capital Shortfall', 'Custom Gap']
+    assert loaded['score_breakdown'] == BREAKDOWN
+    assert loaded['extracted_data'] == SAMPLE_RESULT['extracted_data']
+    input_len, mask = conn.execute("SELECT input_len, failed_mask FROM assessments WHERE id=?", (aid,)).fetchone()
+    assert (input_len, mask) == (len(text), 0b1)
+
+    items, _ = assessment_store.list_assessments(conn, gap='Capital Shortfall', fields=['id', 'doc_hash'])
+    assert [i['id'] for i in items] == [aid]
+    assert len(items[0]['doc_hash']) == 64
+    items, _ = assessment_store.list_assessments(conn, gap='Custom Gap')
+    assert [i['id'] for i in items] == [aid]
+    conn.close()
+
+
+def test_v4_migration_preserves_legacy_payloads(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE assessments (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT NOT NULL, input_len INTEGER, "
+        "readiness_score INTEGER, failed_gaps TEXT, extracted_data TEXT, score_breakdown TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO assessments (id, created_at, input_len, readiness_score, failed_gaps, extracted_data, score_breakdown) "
+        "VALUES (7, '2025-10-01T10:00:00', 999, 40, ?, ?, ?)",
+        (json.dumps(['Capital Shortfall']), json.dumps(SAMPLE_RESULT['extracted_data']), json.dumps(BREAKDOWN)),
+    )
+    conn.commit()
+
+    assessment_store.init_schema(conn)
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(assessments)")}
+    assert 'score_breakdown' not in columns and 'failed_mask' in columns
+    loaded = assessment_store.load_assessment(conn, 7)
+    assert loaded['failed_gaps'] == ['Capital Shortfall']
+    assert loaded['score_breakdown'] == BREAKDOWN
+    assert conn.execute("SELECT input_len FROM assessments WHERE id=7").fetchone()[0] is None
+    assert assessment_store.count_gap_failures(conn, 'Capital Shortfall', '2025-10-01', '2025-11-01') == 1
+    gap_sql, params = assessment_store.gap_predicate(assessment_store.load_rule_versions(conn), 'Capital Shortfall',
+                                                     alias='assessments')
+    plan = conn.execute(
+        f"EXPLAIN QUERY PLAN SELECT COUNT(*) FROM assessments WHERE {gap_sql} AND created_at >= ?", params + ['x']
+    ).fetchall()
+    assert any('COVERING INDEX ix_assessments_created_mask' in str(p) for p in plan)
+    # AUTOINCREMENT continues after the migrated ids
+    nxt = assessment_store.insert_rows(conn, [assessment_store.build_row(SAMPLE_RESULT)])
+    assert nxt == 8
+    conn.close()
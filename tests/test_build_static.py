@@ -0,0 +1,38 @@
+import os
+import sys
+import gzip
+
+# Make repo root and scripts importable
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+import build_static
+import app
+
+
+def test_minify_js_keeps_template_literals_and_code():
+    js = "/* header */\nfunction f() {\n  // note\n  const url = 'https://x';\n  return `\n    <td>${url}</td>\n  `;\n}\n"
+    out = build_static.minify_js(js)
+    assert out == "function f() {\nconst url = 'https://x';\nreturn `\n    <td>${url}</td>\n  `;\n}\n"
+    assert build_static.minify_css("a { color : red; }\n/* x */ b{margin:0;}") == "a{color : red}b{margin:0}\n"
+
+
+def test_built_assets_are_served_precompressed_and_immutable(tmp_path, monkeypatch):
+    out = str(tmp_path / 'dist')
+    manifest = build_static.build(os.path.join(ROOT, 'static'), out)
+    monkeypatch.setattr(app, 'DIST_DIR', out)
+    client = app.app.test_client()
+
+    index = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert index.headers['Content-Encoding'] == 'gzip'
+    assert index.headers['Cache-Control'] == 'no-cache'
+    html = gzip.decompress(index.data).decode()
+    assert f"/static/dist/{manifest['app.js']}" in html
+    assert client.get('/', headers={'If-None-Match': index.headers['ETag'], 'Accept-Encoding': 'gzip'}).status_code == 304
+
+    js = client.get(f"/static/dist/{manifest['app.js']}")
+    assert 'Content-Encoding' not in js.headers
+    assert js.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert js.mimetype == 'text/javascript'
+    assert client.get('/static/dist/missing.js').status_code == 404
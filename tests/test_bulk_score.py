@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import sqlite3
+
+# Make repo root and scripts importable
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+import bulk_score
+
+
+def test_bulk_score_checkpoints_and_resumes(tmp_path):
+    archive = tmp_path / 'archive'
+    archive.mkdir()
+    for i in range(3):
+        (archive / f'pack{i}.txt').write_text(f"Paid-Up Capital: QAR {i + 5},000,000\nData stored in Qatar.")
+    (archive / 'notes.md').write_text("ignored")
+    db = str(tmp_path / 'assessments.db')
+
+    stats = bulk_score.run(str(archive), db_path=db, workers=1, batch_size=2, quiet=True)
+    assert (stats['scored'], stats['failed'], stats['skipped']) == (3, 0, 0)
+
+    conn = sqlite3.connect(db)
+    ids = sorted(r[0] for r in conn.execute("SELECT assessment_id FROM bulk_checkpoint"))
+    assert ids == [r[0] for r in conn.execute("SELECT id FROM assessments ORDER BY id")]
+    conn.close()
+
+    # A second run only picks up the new file
+    (archive / 'pack3.txt').write_text("Paid-Up Capital: QAR 9,000,000")
+    stats = bulk_score.run(str(archive), db_path=db, workers=1, quiet=True)
+    assert (stats['scored'], stats['skipped']) == (1, 3)
+
+
+def test_manifest_items_resolve_paths_and_inline_text(tmp_path):
+    manifest = tmp_path / 'packs.ndjson'
+    manifest.write_text('\n'.join([
+        json.dumps({"id": "a", "path": "docs/a.pdf"}),
+        json.dumps({"id": "b", "text": "Paid-Up Capital: QAR 1"}),
+        "not json",
+        json.dumps({"id": "c"}),
+    ]))
+    items = list(bulk_score.iter_manifest(str(manifest)))
+    assert [i['key'] for i in items] == ['a', 'b']
+    assert items[0]['path'] == os.path.join(str(tmp_path), 'docs/a.pdf')
+    assert items[1]['text'].startswith('Paid-Up')
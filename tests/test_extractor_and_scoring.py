@@ -28,6 +28,7 @@ def test_p2p_monitoring_detection_deployed():
 
 
 def test_scoring_deducts_data_retention():
+    app.ensure_loaded()
     # Prepare a minimal extracted data that will only fail the Data Retention check
     extracted = {
         'paid_up_capital': 8000000,  # pass capital
@@ -61,3 +62,58 @@ def test_scoring_deducts_data_retention():
     per_check = SECTION_WEIGHTS['Digital Consumer Protection'] / len(checks_in_section)
     # The deduction for Data Retention Shortfall should equal per_check
     assert per_check > 0
+
+
+def test_extraction_past_deadline_is_undetermined_and_fails_checks():
+    out = run_extraction(app.FULL_STARTUP_TEXT.replace('Ireland and Singapore', 'Qatar'), deadline_s=1e-9)
+    assert out['undetermined'].keys() >= {'paid_up_capital', 'data_storage_location', 'has_compliance_officer'}
+    assert out['paid_up_capital'] is None and out['data_storage_location'] is None
+    failed = app.run_gap_analysis(out)
+    assert {'Capital Shortfall', 'Data Residency Failure', 'Compliance Officer Missing'} <= set(failed)
+
+
+def test_extraction_stays_linear_on_repetitive_text():
+    # Unbounded `capital.*?QAR` took minutes on this; bounded gaps keep it well under a second
+    import time
+    import ai_extractor
+    text = "capital " * 40000 + "compliance officer " + "has " * 40000
+    # Regex extractors only: the NER pass scales with the model, not with these patterns
+    regex_fields = [f for f in ai_extractor.extraction_fields() if f != 'data_storage_location']
+    started = time.perf_counter()
+    out = run_extraction(text, deadline_s=0, fields=regex_fields)
+    assert time.perf_counter() - started < 5
+    assert out['paid_up_capital'] == 0 and 'undetermined' not in out
+
+    # Two gaps in one pattern (aml ... policy ... approved) used to cost window^2 per "aml"
+    started = time.perf_counter()
+    assert ai_extractor.extract_aml_policy("aml policy " * 58000) is False
+    assert time.perf_counter() - started < 5
+    assert ai_extractor.extract_aml_policy("the aml framework and policy were approved by the board") is True
+
+
+def test_selected_fields_run_only_their_extractors(monkeypatch):
+    import ai_extractor
+
+    def no_nlp():
+        raise AssertionError("spaCy must not be used for a capital-only lookup")
+
+    monkeypatch.setattr(ai_extractor, 'get_nlp', no_nlp)
+    out = run_extraction(app.FULL_STARTUP_TEXT, fields=['paid_up_capital'])
+    assert out == {'paid_up_capital': 5000000}
+    assert [ex.field for ex in ai_extractor.plan_extraction(['data_storage_location'])] == \
+        ['gpe_entities', 'data_storage_location']
+
+
+def test_map_startup_data_fields_parameter():
+    client = app.app.test_client()
+    r = client.post('/api/map_startup_data', json={'documents': app.FULL_STARTUP_TEXT,
+                                                   'fields': 'paid_up_capital,business_categories'})
+    assert r.status_code == 200
+    assert r.get_json() == {'paid_up_capital': 5000000, 'business_categories': ['P2P Lending (Category 2)']}
+
+    r = client.post('/api/map_startup_data', json={'documents': 'x', 'fields': ['gpe_entities']})
+    assert r.status_code == 400 and 'paid_up_capital' in r.get_json()['fields']
+    for bad in ([1], [['a']], '', [], {'a': 1}):
+        r = client.post('/api/map_startup_data', json={'documents': 'x', 'fields': bad})
+        assert r.status_code == 400, bad
+    assert client.post('/api/map_startup_data?fields=', json={'documents': 'x'}).status_code == 400
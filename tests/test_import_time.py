@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous for slow CI machines; importing spaCy and its model alone takes ~1s
+IMPORT_BUDGET_S = float(os.environ.get('QIAS_IMPORT_BUDGET_S', '0.6'))
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(elapsed, 'spacy' in sys.modules, 'reportlab' in sys.modules, app._LOADED)
+"""
+
+
+def _import_app():
+    out = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    elapsed, spacy_loaded, reportlab_loaded, data_loaded = out.stdout.split()[-4:]
+    return float(elapsed), spacy_loaded == 'True', reportlab_loaded == 'True', data_loaded == 'True'
+
+
+def test_import_app_is_side_effect_free_and_within_budget():
+    # Best of three, so a noisy neighbour doesn't fail the run
+    runs = [_import_app() for _ in range(3)]
+    elapsed = min(r[0] for r in runs)
+    _, spacy_loaded, reportlab_loaded, data_loaded = runs[0]
+    assert not spacy_loaded, "import app must not import spaCy (load it via ai_extractor.get_nlp)"
+    assert not reportlab_loaded, "import app must not import reportlab"
+    assert not data_loaded, "import app must not load data files or touch the DB"
+    assert elapsed < IMPORT_BUDGET_S, f"import app took {elapsed:.3f}s (budget {IMPORT_BUDGET_S}s)"
+
+
+def test_ensure_loaded_and_warmup():
+    import app
+    app.ensure_loaded()
+    assert app.REGULATORY_CHECKS and app.SECTION_WEIGHTS and app.RESOURCE_MAPPING
+    app.warmup()
+    assert app.ai_extractor._nlp_loaded
@@ -0,0 +1,43 @@
+import os
+import sys
+import threading
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import metrics
+
+
+def test_sharded_counters_and_histograms_sum_across_threads():
+    registry = metrics.Registry()
+    requests = registry.counter('t_requests_total', 'Requests.', ('endpoint',))
+    latency = registry.histogram('t_seconds', 'Latency.', ('stage',), buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(500):
+            requests.inc('/api/scorecard')
+            latency.observe(0.05, 'extract')
+        latency.observe(5, 'extract')
+
+    threads = [threading.Thread(target=work) for _ in range(metrics._FOLD_THRESHOLD + 10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    n = len(threads)
+    text = registry.render()
+    assert f't_requests_total{{endpoint="/api/scorecard"}} {500 * n}' in text
+    assert f't_seconds_bucket{{stage="extract",le="0.1"}} {500 * n}' in text
+    assert f't_seconds_bucket{{stage="extract",le="+Inf"}} {501 * n}' in text
+    assert f't_seconds_count{{stage="extract"}} {501 * n}' in text
+    assert '# TYPE t_seconds histogram' in text
+    # Finished threads are folded into the base totals
+    assert requests._shards == []
+
+
+def test_callback_metrics_and_label_escaping():
+    registry = metrics.Registry()
+    registry.callback('t_ratio', 'Ratio.', 'gauge', lambda: {('a"b',): 0.5, ('none',): None}, ('cache',))
+    text = registry.render()
+    assert 't_ratio{cache="a\\"b"} 0.5' in text
+    assert 'none' not in text
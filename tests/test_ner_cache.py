@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import ai_extractor
+import ner_cache
+
+TEXT = "Our data is hosted in Ireland.\nBackups are kept in Singapore and the State of Qatar."
+
+
+class FakeNlp:
+    """Stands in for the spaCy pipeline: tags a few known place names as GPE."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        ents = []
+        for name in ('Ireland', 'Singapore', 'Qatar'):
+            i = text.find(name)
+            if i >= 0:
+                ents.append(SimpleNamespace(start_char=i, end_char=i + len(name), label_='GPE'))
+        ents.sort(key=lambda e: e.start_char)
+        sents = [SimpleNamespace(start_char=0, end_char=len(text))]
+        return SimpleNamespace(ents=ents, sents=sents, has_annotation=lambda attr: True)
+
+
+def test_encode_decode_roundtrip():
+    ents = [(0, 5, 'GPE'), (10, 20, 'ORG'), (30, 35, 'GPE')]
+    sents = [(0, 25), (26, 40)]
+    assert ner_cache.decode(ner_cache.encode(ents, sents)) == (ents, sents)
+    assert ner_cache.decode(ner_cache.encode([], [])) == ([], [])
+
+
+def test_cached_ner_is_reused_without_the_model(tmp_path, monkeypatch):
+    fake = FakeNlp()
+    monkeypatch.setattr(ai_extractor, 'get_nlp', lambda: fake)
+    ai_extractor.set_ner_cache(str(tmp_path / 'ner.db'))
+    try:
+        first = ai_extractor.run_extraction(TEXT)
+        assert fake.calls == 1
+        assert ai_extractor.extract_gpe_entities(TEXT) == ['Ireland', 'Singapore', 'Qatar']
+
+        def no_model():
+            raise AssertionError("cached text must not need the model")
+
+        monkeypatch.setattr(ai_extractor, 'get_nlp', no_model)
+        assert ai_extractor.run_extraction(TEXT) == first
+        ents, sents, complete = ai_extractor.analyse_text(TEXT)
+        assert complete and sents == [(0, len(TEXT))]
+        assert ai_extractor.get_ner_cache().stats()['entries'] == 1
+    finally:
+        ai_extractor.set_ner_cache(None)
+
+
+def test_deadline_during_ner_leaves_locations_undetermined(monkeypatch):
+    fake = FakeNlp()
+
+    def slow_nlp(text):
+        time.sleep(0.3)
+        return fake(text)
+
+    monkeypatch.setattr(ai_extractor, 'get_nlp', lambda: slow_nlp)
+    text = TEXT + '\n' + 'filler line\n' * 2500  # more than one NER chunk
+    out = ai_extractor.run_extraction(text, deadline_s=0.2, fields=['data_storage_location'])
+    assert fake.calls == 1
+    assert out['data_storage_location'] is None
+    assert 'gpe_entities' in out['undetermined']['data_storage_location']
@@ -0,0 +1,24 @@
+import os
+import sys
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import report_cache
+
+
+def test_cache_evicts_least_recently_served(tmp_path):
+    cache = report_cache.ReportCache(str(tmp_path), max_bytes=250)
+    cache.put('a', b'x' * 100)
+    cache.put('b', b'x' * 100)
+    os.utime(cache.path_for('a'), (1, 1))
+    os.utime(cache.path_for('b'), (2, 2))
+    assert cache.get('a')  # touching 'a' makes 'b' the oldest
+
+    cache.put('c', b'x' * 100)
+    assert cache.get('b') is None
+    assert cache.get('a') and cache.get('c')
+    assert cache.evictions == 1
+    assert cache.stats()['bytes'] == 200
+    # Larger than the whole budget: never cached
+    assert cache.put('d', b'x' * 300) is None
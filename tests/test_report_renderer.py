@@ -0,0 +1,37 @@
+import os
+import sys
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import report_renderer
+
+
+def _result(checks):
+    return {
+        'readiness_score': 50,
+        'failed_gaps': [],
+        'score_breakdown': [{'check': f'C{i}', 'status': 'PASS', 'weight': 1, 'score_contribution': 1} for i in range(checks)],
+        'recommendations': [{'gap': 'Capital Shortfall', 'resources': [{'name': 'Expert', 'type': 'Compliance Expert'}]}],
+    }
+
+
+def test_layout_paginates_long_breakdowns_within_page_body():
+    pages = report_renderer.layout_report(_result(120), max_breakdown_rows=None)
+    assert len(pages) > 1
+    texts = [line[5] for page in pages for line in page.lines]
+    assert sum(t.startswith('C') and ': PASS' in t for t in texts) == 120
+    assert texts[-1].startswith('• Expert')
+    for page in pages:
+        for _, _, colour, _, y, _ in page.lines:
+            assert colour == 'white' or report_renderer.BODY_BOTTOM - 0.6 * report_renderer.CM < y <= report_renderer.BODY_TOP
+    # Default caps keep the original 30-row limit
+    capped = report_renderer.layout_report(_result(120))
+    assert sum(': PASS' in line[5] for page in capped for line in page.lines) == 30
+
+
+def test_build_pdf_renders_every_page():
+    pdf = report_renderer.build_pdf_from_result(_result(120), max_breakdown_rows=None)
+    assert pdf.startswith(b'%PDF')
+    pages = report_renderer.layout_report(_result(120), max_breakdown_rows=None)
+    assert pdf.count(b'/Type /Page\n') == len(pages)
@@ -0,0 +1,94 @@
+import os
+import sys
+
+# Make repo root and scripts importable
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+import request_log
+import request_report
+
+
+def test_records_rotate_and_rank(tmp_path):
+    path = str(tmp_path / 'logs' / 'requests.log.jsonl')
+    log = request_log.RequestLog(path, max_bytes=600, backups=3, trace_memory=True)
+    for i in range(8):
+        start = log.begin()
+        blob = [bytearray(1024) for _ in range(50 * i)]
+        record = log.end(start, method='POST', path='/api/scorecard', endpoint='/api/scorecard', status=200,
+                         input_bytes=i, text_chars=None)
+        del blob
+    assert record['py_peak_kb'] >= 300 and record['cpu_ms'] >= 0 and record['in_flight'] == 1
+
+    files = request_log.log_files(path)
+    assert len(files) > 1 and files[-1] == path
+    records = list(request_log.iter_records(path))
+    assert [r['input_bytes'] for r in records] == list(range(8 - len(records), 8))
+
+    worst = request_report.worst(iter(records), 'memory', 2)
+    assert [r['input_bytes'] for r in worst] == [7, 6]
+    assert request_report.main(['--log', path, '--by', 'latency', '--top', '3']) == 0
+    import tracemalloc
+    tracemalloc.stop()
+
+
+
+def test_forked_workers_log_to_their_own_files(tmp_path):
+    import pytest
+    if not hasattr(os, 'fork'):
+        pytest.skip("needs fork()")
+    path = str(tmp_path / 'requests.log.jsonl')
+    log = request_log.RequestLog(path, max_bytes=300, backups=2)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            log.open_for_worker(os.getpid())
+            for i in range(5):
+                log.end(log.begin(), path='/child', input_bytes=i)
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    log.end(log.begin(), path='/parent', input_bytes=0)
+
+    child_log = request_log.worker_path(path, pid)
+    assert os.path.exists(child_log) and os.path.exists(child_log + '.1')
+    assert request_log.log_files(path)[-1] == path
+    records = list(request_log.iter_records(path))
+    assert [r['path'] for r in records].count('/parent') == 1
+    assert [r['input_bytes'] for r in records if r['path'] == '/child'][-1] == 4
+
+
+def test_app_records_streamed_and_failed_requests(tmp_path, monkeypatch):
+    import time
+    import pytest
+    import app
+
+    path = str(tmp_path / 'requests.log.jsonl')
+    log = request_log.RequestLog(path)
+    monkeypatch.setattr(app, 'REQUEST_LOG', log)
+
+    def slow_stream():
+        def body():
+            time.sleep(0.2)
+            yield 'done'
+        return app.Response(body())
+
+    def broken():
+        raise ZeroDivisionError()
+
+    monkeypatch.setitem(app.app.view_functions, 'export_assessments', slow_stream)
+    monkeypatch.setitem(app.app.view_functions, 'status', broken)
+    monkeypatch.setitem(app.app.config, 'PROPAGATE_EXCEPTIONS', True)
+    client = app.app.test_client()
+    r = client.get('/api/assessments/export')
+    assert r.get_data() == b'done'
+    r.close()
+    with pytest.raises(ZeroDivisionError):
+        client.get('/api/status')  # propagated, so no after_request
+
+    records = list(request_log.iter_records(path))
+    # The streamed body is measured once it was produced, not when the view returned
+    assert records[0]['path'] == '/api/assessments/export' and records[0]['wall_ms'] >= 200
+    assert records[1]['status'] == 500 and records[1]['error'] == 'ZeroDivisionError'
+    assert log._in_flight == 0
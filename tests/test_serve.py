@@ -0,0 +1,67 @@
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="serve.py needs fork()")
+
+
+def _start(tmp_path, *args):
+    # Everything the server writes goes under tmp_path, never into the checkout
+    env = dict(os.environ, PYTHONUNBUFFERED='1', QIAS_REPORT_CACHE_DIR=str(tmp_path / 'reports'),
+               QIAS_DB_PATH=str(tmp_path / 'assessments.db'))
+    proc = subprocess.Popen([sys.executable, 'serve.py', '--port', '0', *args], cwd=ROOT, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    lines = []
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        line = proc.stdout.readline()
+        lines.append(line)
+        m = re.search(r'Listening on http://127\.0\.0\.1:(\d+)', line)
+        if m:
+            return proc, int(m.group(1)), lines
+        if not line and proc.poll() is not None:
+            break
+    proc.kill()
+    pytest.fail("server did not start:\n" + ''.join(lines))
+
+
+def _get(port, path='/api/status'):
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=10) as r:
+        return r.status
+
+
+def _read(port, path):
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=10) as r:
+        return r.read().decode()
+
+
+def test_prefork_server_recycles_reloads_and_stops(tmp_path):
+    proc, port, lines = _start(tmp_path, '--workers', '2', '--threads', '2', '--max-requests', '2')
+    try:
+        # More requests than 2 workers x 2 requests: recycled workers get replaced
+        assert [_get(port) for _ in range(8)] == [200] * 8
+        # Per-worker values are told apart by the worker label
+        assert re.search(r'^qias_\w+\{[^}]*worker="\d+"', _read(port, '/api/metrics'), re.M)
+
+        proc.send_signal(signal.SIGHUP)
+        time.sleep(0.5)
+        assert _get(port) == 200
+
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=30) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    output = ''.join(lines) + proc.stdout.read()
+    assert 'recycling after 2 requests' in output
+    assert 'Reloaded; generation 2' in output
+    assert 'Preloaded app' in output
@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Make repo root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import singleflight
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = singleflight.SingleFlight()
+    runs = []
+    gate = threading.Event()
+
+    def compute():
+        runs.append(1)
+        gate.wait(5)
+        return {'score': 40}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', compute))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while flight.coalesced < 4:
+        time.sleep(0.01)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert len(runs) == 1
+    assert all(value == {'score': 40} for value, _ in results)
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.stats() == {'executed': 1, 'coalesced': 4, 'in_flight': 0}
+    # Finished calls are not cached
+    assert flight.do('k', lambda: 'again') == ('again', False)
+
+
+def test_errors_reach_every_waiter():
+    flight = singleflight.SingleFlight()
+    gate = threading.Event()
+    errors = []
+
+    def boom():
+        gate.wait(5)
+        raise ValueError('bad input')
+
+    def call():
+        try:
+            flight.do('k', boom)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    while flight.coalesced < 2:
+        time.sleep(0.01)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert errors == ['bad input'] * 3
+    with pytest.raises(KeyError):
+        flight.do('other', lambda: {}['missing'])